@@ -16,7 +16,12 @@ fi
 
 
 echo "激活虚拟环境..."
-source "$VENV_DIR/Scripts/activate"
+# Linux/macOS 为 bin，Windows(Git Bash)为 Scripts
+if [ -f "$VENV_DIR/bin/activate" ]; then
+  source "$VENV_DIR/bin/activate"
+else
+  source "$VENV_DIR/Scripts/activate"
+fi
 
 
 if [ -f "$PROJECT_ROOT/requirements.txt" ]; then
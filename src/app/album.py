@@ -0,0 +1,108 @@
+import html
+import json
+import re
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import aiohttp
+
+from app.fetch import DEFAULT_HEADERS
+from app.throttle import AdaptiveController, throttled
+from app.utils.logger import logger
+
+
+ALBUM_NAME_PATTERN = re.compile(r'id="js_tag_name"[^>]*>(.*?)<', re.S)
+
+
+class AlbumApiParser:
+    """直接分页请求合集页面使用的列表接口(/mp/appmsgalbum?action=getalbum)
+
+    与合集页面自身的翻页方式一致：用上一页最后一篇的 msgid/itemidx 作为游标。
+    api_base 可以指向本地桩服务器，便于用录制的合集数据测试。
+    """
+
+    def __init__(self, api_base: str = "https://mp.weixin.qq.com", page_size: int = 20,
+                 max_pages: int = 500, timeout: float = 20, throttle: Optional[AdaptiveController] = None):
+        self.api_base = api_base.rstrip("/")
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.timeout = timeout
+        # 与文章抓取共用的限速器，列表接口同样会触发验证
+        self.throttle = throttle
+        self.album_name = "未命名合集"
+
+    async def parse(self, album_url: str) -> Dict:
+        """返回与 parse_album 相同的 {album_name, articles, total} 结构"""
+        articles: List[Dict] = []
+        async for batch in self.iter_articles(album_url):
+            articles.extend(batch)
+        return {
+            "album_name": self.album_name,
+            "articles": articles,
+            "total": len(articles)
+        }
+
+    async def iter_articles(self, album_url: str) -> AsyncIterator[List[Dict]]:
+        """逐页产出新文章，album_name 在第一页产出前确定"""
+        query = parse_qs(urlsplit(album_url).query)
+        biz = query.get("__biz", [None])[0]
+        album_id = query.get("album_id", [None])[0]
+        if not biz or not album_id:
+            raise ValueError(f"合集链接缺少 __biz 或 album_id: {album_url}")
+
+        params = {"action": "getalbum", "__biz": biz, "album_id": album_id,
+                  "count": str(self.page_size), "f": "json"}
+        seen = set()
+        async with aiohttp.ClientSession(headers=DEFAULT_HEADERS,
+                                         timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+            self.album_name = await self._fetch_album_name(session, biz, album_id) or self.album_name
+            logger.info(f"合集名称: {self.album_name}")
+
+            for page_index in range(self.max_pages):
+                async with throttled(self.throttle):
+                    async with session.get(f"{self.api_base}/mp/appmsgalbum", params=params) as response:
+                        response.raise_for_status()
+                        data = json.loads(await response.text())
+
+                ret = data.get("base_resp", {}).get("ret", 0)
+                if ret != 0:
+                    raise RuntimeError(f"合集接口返回错误: ret={ret}")
+                resp = data.get("getalbum_resp") or {}
+                items = resp.get("article_list") or []
+                # 只有一篇文章时接口返回的是对象而不是列表
+                if isinstance(items, dict):
+                    items = [items]
+
+                batch = []
+                for item in items:
+                    link = self._normalize_link(item.get("url", ""))
+                    if link and link not in seen:
+                        seen.add(link)
+                        batch.append({"title": html.unescape(item.get("title", "")).strip() or "无标题",
+                                      "link": link})
+                logger.info(f"合集接口第 {page_index + 1} 页: {len(batch)} 篇，累计 {len(seen)} 篇")
+                if batch:
+                    yield batch
+
+                if str(resp.get("continue_flag", "0")) != "1" or not items:
+                    return
+                params["begin_msgid"] = str(items[-1].get("msgid", ""))
+                params["begin_itemidx"] = str(items[-1].get("itemidx", ""))
+            logger.info(f"合集接口翻页达到上限 {self.max_pages}，停止")
+
+    async def _fetch_album_name(self, session: aiohttp.ClientSession, biz: str, album_id: str) -> Optional[str]:
+        params = {"action": "getalbum", "__biz": biz, "album_id": album_id}
+        async with session.get(f"{self.api_base}/mp/appmsgalbum", params=params) as response:
+            if response.status != 200:
+                return None
+            match = ALBUM_NAME_PATTERN.search(await response.text())
+        if not match:
+            return None
+        return html.unescape(match.group(1)).replace("合集：#", "").strip() or None
+
+    @staticmethod
+    def _normalize_link(link: str) -> str:
+        link = html.unescape(link).strip()
+        if link.startswith("http://"):
+            link = "https://" + link[len("http://"):]
+        return link
@@ -1,36 +1,85 @@
-from typing import Optional
-from playwright.async_api import async_playwright
+from typing import Callable, List, Optional
 from app.utils.logger import logger
-from app.wx import WechatArticleDownloader
+from app.pool import PagePool
+from app.wx import FormatTypes, WechatArticleDownloader
 
 
 class BrowserManager:
-    def __init__(self):
+    def __init__(self, pool_size: int = 4, engine: str = "browser"):
         self.playwright = None
         self.browser = None
+        self.context = None
         self.page = None
-        self.downloader = WechatArticleDownloader()
+        self.pool: Optional[PagePool] = None
+        self.pool_size = pool_size
+        self._launch_error: Optional[BaseException] = None
+        self.downloader = WechatArticleDownloader(concurrency=pool_size, engine=engine)
 
     async def open_browser(self):
-        """使用 Playwright 异步 API 打开浏览器实例并创建页面."""
+        """使用 Playwright 异步 API 打开浏览器实例并创建页面池.
+
+        http 引擎不在这里启动浏览器：页面池按需创建页面，第一次退回浏览器时才启动 Chromium，
+        没有安装 Chromium 的机器也能只用 http 引擎下载。
+        """
+        if self.downloader.engine == "http":
+            self.pool = PagePool(self._launch_context, size=self.pool_size, lazy=True)
+            await self.pool.open()
+            return True
         try:
-            self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(headless=True)  # 默认使用 Chromium
-            self.page = await self.browser.new_page()
-            # await self.page.goto("https://www.bing.com/")
+            self.pool = PagePool(await self._launch_context(), size=self.pool_size)
+            await self.pool.open()
+            self.page = self.pool.pages[0]
             return True
         except Exception as e:
             logger.info(f"使用 Playwright 异步 API 打开浏览器失败: {e}")
+            # 释放已经启动的部分(如 Playwright 驱动进程)，下次重新打开
+            await self.close_browser()
+            return False
+
+    async def _launch_context(self):
+        """启动 Chromium 并返回浏览器上下文；按需启动失败后不再重试，直到重新打开浏览器"""
+        if self._launch_error is not None:
+            raise RuntimeError(f"浏览器启动失败: {self._launch_error}")
+        try:
+            # 第一次打开浏览器时才导入 Playwright，不拖慢程序启动
+            from playwright.async_api import async_playwright
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(headless=True)  # 默认使用 Chromium
+            self.context = await self.browser.new_context()
+            return self.context
+        except Exception as e:
+            if self.pool is not None and self.pool.lazy:
+                logger.info(f"退回浏览器下载时启动 Chromium 失败: {e}")
+                self._launch_error = e
+                # 只释放已经启动的部分，页面池保留给 close_browser
+                if self.playwright:
+                    try:
+                        await self.playwright.stop()
+                    except Exception:
+                        pass
+                self.playwright = self.browser = self.context = None
+            raise
+
+    def is_connected(self) -> bool:
+        """页面池已就绪，且浏览器(如果已启动)仍然连接"""
+        if self.pool is None:
             return False
+        return self.browser is None or self.browser.is_connected()
 
     async def close_browser(self):
         """关闭当前 Playwright 浏览器实例和上下文."""
-        if self.page:
+        await self.downloader.close()
+        self._launch_error = None
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+            self.page = None
+        if self.context:
             try:
-                await self.page.close()
-                self.page = None
+                await self.context.close()
+                self.context = None
             except Exception as e:
-                logger.info(f"关闭 Playwright 页面失败: {e}")
+                logger.info(f"关闭 Playwright 上下文失败: {e}")
                 return False
         if self.browser:
             try:
@@ -48,25 +97,42 @@ class BrowserManager:
                 return False
         return True
 
-    async def download_one(self, url: str, output_dir: Optional[str] = None, format_type: Optional[str] = None):
+    async def download_one(self, url: str, output_dir: Optional[str] = None, format_type: FormatTypes = None):
         try:
-            await self.downloader.download_single_article(page=self.page, url=url, output_dir=output_dir,
-                                                           format_type=format_type)
+            # 页面在需要时才借出，http 引擎抓取成功时不占用页面
+            await self.downloader.download_single_article(page_factory=self.pool.page, url=url,
+                                                           output_dir=output_dir, format_type=format_type)
             logger.info(f"下载文章完成：{url}")
         except Exception as e:
             logger.error(f"下载文章失败：{e}")
 
-    async def download_album(self, url: str, output_dir: str = None, format_type: Optional[str] = None):
+    async def parse_album(self, url: str):
+        return await self.downloader.parse_album(url=url, page_factory=self.pool.page)
+
+    async def download_articles(self, articles: List, output_dir: Optional[str] = None,
+                                format_type: FormatTypes = None,
+                                progress_callback: Optional[Callable[[int, int], None]] = None):
+        """并发下载文章列表，articles 可以是 URL 或 {"title", "link"} 字典"""
         try:
-            await self.downloader.download_album(page=self.page, album_url=url, output_dir=output_dir,
-                                                  format_type=format_type)
+            await self.downloader.download_articles(pool=self.pool, articles=articles, output_dir=output_dir,
+                                                    format_type=format_type,
+                                                    progress_callback=progress_callback)
+        except Exception as e:
+            logger.error(f"下载文章列表失败：{e}")
+
+    async def download_album(self, url: str, output_dir: str = None, format_type: FormatTypes = None,
+                             progress_callback: Optional[Callable[[int, int], None]] = None):
+        """边解析边下载整个合集"""
+        try:
+            await self.downloader.download_album(pool=self.pool, album_url=url, output_dir=output_dir,
+                                                  format_type=format_type, progress_callback=progress_callback)
             logger.info(f"下载合集完成：{url}")
         except Exception as e:
             logger.error(f"下载合集失败：{e}")
 
-    async def batch_download(self, urls, output_dir=None, format_type: Optional[str] = None):
+    async def batch_download(self, urls, output_dir=None, format_type: FormatTypes = None):
         try:
-            await self.downloader.batch_download(page=self.page, urls_text=urls, output_dir=output_dir,
+            await self.downloader.batch_download(pool=self.pool, urls_text=urls, output_dir=output_dir,
                                                   format_type=format_type)
 
             logger.info(f"批量下载完成：{urls}")
@@ -0,0 +1,158 @@
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+from app.export.document import MINIMAL_PRUNE, ArticleDocument, PruneOptions
+from app.utils.logger import logger
+
+
+DEFAULT_CACHE_DIR = Path.home() / ".weclip" / "cache"
+MANIFEST_FILENAME = ".weclip-manifest.json"
+# 作者可能修改已发布的文章，下载时超过 7 天的缓存视为过期重新抓取；离线重新导出不受限制
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+# 长链接中唯一确定一篇文章的参数，其余(chksm、scene、分享来源等)每次分享都不同
+ARTICLE_KEY_PARAMS = ("__biz", "mid", "idx", "sn")
+
+
+def canonical_url(url: str) -> str:
+    """去掉分享参数和锚点，同一篇文章的不同链接得到相同的结果"""
+    parts = urlsplit(url.strip())
+    scheme = "https" if parts.scheme in ("http", "https", "") else parts.scheme
+    netloc = parts.netloc.lower()
+    query = ""
+    if parts.path.rstrip("/") == "/s":
+        params = parse_qs(parts.query)
+        query = urlencode([(key, params[key][0]) for key in ARTICLE_KEY_PARAMS if key in params])
+    return urlunsplit((scheme, netloc, parts.path, query, ""))
+
+
+class DocumentCache:
+    """按规范化文章链接的哈希保存提取结果(正文 HTML 和元数据)
+
+    每篇文章一个 JSON 文件，文件修改时间即最近使用时间；
+    总大小超过 max_bytes 时按最近最少使用淘汰，max_age 之前抓取的条目视为过期。
+    """
+
+    def __init__(self, root: Path = DEFAULT_CACHE_DIR, max_bytes: int = 512 * 1024 * 1024,
+                 max_age: Optional[float] = DEFAULT_MAX_AGE):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    def _path(self, url: str) -> Path:
+        key = hashlib.sha256(canonical_url(url).encode("utf-8")).hexdigest()
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, url: str, prune: Optional[PruneOptions] = None,
+            ignore_age: bool = False) -> Optional[ArticleDocument]:
+        """读取缓存；缓存的正文比 prune 裁剪得更多(缺少需要的内容)或已过期时视为未命中
+
+        ignore_age 为 True 时不检查过期(离线重新导出只能使用缓存)。
+        """
+        path = self._path(url)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.stats["misses"] += 1
+            return None
+        cached_prune = PruneOptions(**{**dataclasses.asdict(MINIMAL_PRUNE), **entry.get("prune", {})})
+        expired = not ignore_age and self.max_age is not None and time.time() - entry["fetched_at"] > self.max_age
+        if expired or (prune is not None and not cached_prune.within(prune)):
+            self.stats["misses"] += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.stats["hits"] += 1
+        fields = entry["document"]
+        return ArticleDocument(**{**fields, "images": tuple(fields["images"])})
+
+    def put(self, url: str, document: ArticleDocument, prune: PruneOptions = MINIMAL_PRUNE):
+        path = self._path(url)
+        entry = {
+            "url": url,
+            "canonical_url": canonical_url(url),
+            "fetched_at": time.time(),
+            "prune": dataclasses.asdict(prune),
+            "document": dataclasses.asdict(document),
+        }
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._ensure_size()
+            try:
+                self._size -= path.stat().st_size
+            except OSError:
+                pass
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，中途退出不会留下半个条目
+            temp_path = path.with_suffix(".tmp")
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _ensure_size(self):
+        if self._size is None:
+            self._size = sum(path.stat().st_size for path in self.root.glob("*/*.json"))
+
+    def _evict(self):
+        """删除最久未使用的条目，直到总大小降到上限的 90%"""
+        entries = sorted(((path.stat().st_mtime, path) for path in self.root.glob("*/*.json")),
+                         key=lambda entry: entry[0])
+        target = self.max_bytes * 0.9
+        for _, path in entries:
+            if self._size <= target:
+                break
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except OSError:
+                continue
+            self._size -= size
+            self.stats["evicted"] += 1
+        logger.info(f"文章缓存超过上限，已淘汰 {self.stats['evicted']} 篇，当前 {self._size / 1024 / 1024:.1f} MB")
+
+
+class OutputManifest:
+    """输出目录中记录下载过哪些文章的清单，离线重新导出时按它从缓存中取文章"""
+
+    def __init__(self, output_dir: Path, title: Optional[str] = None):
+        self.path = Path(output_dir) / MANIFEST_FILENAME
+        self.title = title
+        self.articles: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self.title = self.title or data.get("title")
+                self.articles = {article["url"]: article for article in data.get("articles", [])}
+            except (OSError, ValueError, KeyError) as e:
+                logger.info(f"读取下载清单失败({e})，将重新生成: {self.path}")
+
+    def add(self, url: str, title: str, files: List[Path], assets: Dict[str, str]):
+        """记录一篇文章的输出文件和图片的本地路径(原始地址 -> 相对路径)"""
+        article = self.articles.setdefault(url, {"url": url, "files": [], "assets": {}})
+        article["title"] = title
+        names = {Path(file).name for file in files}
+        article["files"] = sorted(set(article["files"]) | names)
+        article["assets"].update(assets)
+
+    def save(self, order: Optional[List[str]] = None):
+        """写入清单，文章按 order(合集顺序)排列"""
+        articles = list(self.articles.values())
+        if order:
+            position = {url: index for index, url in enumerate(order)}
+            articles.sort(key=lambda article: position.get(article["url"], len(position)))
+        data = {"title": self.title, "articles": articles}
+        self.path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+from app.errors import ArticleBlockedError, ArticleDeletedError, VerificationPageError
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+
+# 页面分类
+NORMAL = "normal"
+DELETED = "deleted"
+BLOCKED = "blocked"
+VERIFICATION = "verification"
+# 在限定时间内还无法判断(页面仍在加载)，交给后续的正文提取处理
+UNKNOWN = "unknown"
+
+PAGE_KIND_NAMES = {
+    NORMAL: "正常文章",
+    DELETED: "已删除",
+    BLOCKED: "被屏蔽",
+    VERIFICATION: "验证页",
+    UNKNOWN: "无法判断",
+}
+
+# 只在页面没有文章正文时才按这些文字判断，避免正文中恰好提到它们时误判
+PAGE_MARKERS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    (VERIFICATION, ("环境异常", "完成验证后即可继续访问", "wappoc_appmsgcaptcha", "secitptpage")),
+    (DELETED, ("该内容已被发布者删除", "此内容已被发布者删除", "The content has been deleted by the author")),
+    (BLOCKED, ("此内容因违规无法查看", "此内容被投诉且经审核涉嫌侵权", "此内容发送失败无法查看",
+               "涉嫌违反相关法律法规和政策", "该公众号已被屏蔽", "Unable to view this content because it violates")),
+)
+
+CONTENT_IDS = ("js_content", "page-content")
+
+PAGE_ERRORS = {
+    DELETED: (ArticleDeletedError, "文章已被发布者删除"),
+    BLOCKED: (ArticleBlockedError, "文章已被屏蔽，无法查看"),
+    VERIFICATION: (VerificationPageError, "遇到验证页面"),
+}
+
+# 返回分类，还无法判断时返回 null，供 wait_for_function 继续轮询
+CLASSIFY_PAGE_JS = """([markers, contentIds]) => {
+    const url = location.href;
+    for (const [kind, list] of markers) {
+        if (list.some(marker => url.includes(marker))) return kind;
+    }
+    if (contentIds.some(id => document.getElementById(id))) return "normal";
+    const text = document.body ? document.body.innerText.slice(0, 5000) : "";
+    for (const [kind, list] of markers) {
+        if (list.some(marker => text.includes(marker))) return kind;
+    }
+    return null;
+}"""
+
+
+def classify_html(text: str, final_url: str = "") -> str:
+    """按服务端返回的 HTML 判断页面类型，规则与浏览器中的 CLASSIFY_PAGE_JS 一致"""
+    for kind, markers in PAGE_MARKERS:
+        if any(marker in final_url for marker in markers):
+            return kind
+    if any(f'id="{content_id}"' in text for content_id in CONTENT_IDS):
+        return NORMAL
+    for kind, markers in PAGE_MARKERS:
+        if any(marker in text for marker in markers):
+            return kind
+    return UNKNOWN
+
+
+async def classify_page(page: Page, timeout: float = 5.0) -> str:
+    """导航(domcontentloaded)后立即判断页面类型，不等待图片和脚本加载完"""
+    try:
+        handle = await page.wait_for_function(CLASSIFY_PAGE_JS, arg=[PAGE_MARKERS, CONTENT_IDS],
+                                              timeout=timeout * 1000)
+        return await handle.json_value()
+    except Exception:
+        # 超时(页面仍是空白或跳转中)时不下结论
+        return UNKNOWN
+
+
+def raise_for_page_kind(kind: str, url: str):
+    """删除、屏蔽和验证页抛出对应的 ArticleError 子类，其余直接返回"""
+    if kind in PAGE_ERRORS:
+        error_class, message = PAGE_ERRORS[kind]
+        raise error_class(message, url)
+
+
+def page_kind_of(error: Optional[BaseException]) -> Optional[str]:
+    """由文章的最终结果推断页面类型；与页面类型无关的失败(超时、网络错误等)返回 None"""
+    if error is None:
+        return NORMAL
+    for kind, (error_class, _) in PAGE_ERRORS.items():
+        if isinstance(error, error_class):
+            return kind
+    return None
+
+
+def count_page_kinds(results: Iterable[Tuple[object, Optional[BaseException]]]) -> Dict[str, int]:
+    """统计一次下载中各类页面的数量，results 为 run_bounded 的返回值"""
+    stats: Dict[str, int] = {}
+    for _, error in results:
+        kind = page_kind_of(error)
+        if kind is not None:
+            stats[kind] = stats.get(kind, 0) + 1
+    return stats
+
+
+def format_page_stats(stats: Dict[str, int]) -> str:
+    return "，".join(f"{PAGE_KIND_NAMES[kind]} {count} 篇" for kind, count in stats.items() if count)
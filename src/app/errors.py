@@ -0,0 +1,22 @@
+class ArticleError(Exception):
+    """文章抓取相关错误的基类"""
+
+    def __init__(self, message: str, url: str = ""):
+        super().__init__(message)
+        self.url = url
+
+
+class ContentMissingError(ArticleError):
+    """页面中没有找到文章正文(#page-content / #js_content)"""
+
+
+class VerificationPageError(ArticleError):
+    """微信返回了验证页或“环境异常”页，而不是文章"""
+
+
+class ArticleDeletedError(ArticleError):
+    """文章已被发布者删除"""
+
+
+class ArticleBlockedError(ArticleError):
+    """文章因违规、投诉等原因被屏蔽，无法查看"""
@@ -0,0 +1,221 @@
+import asyncio
+import dataclasses
+import hashlib
+import html
+import json
+import re
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+
+from app.utils.logger import logger
+from .document import ArticleDocument
+from .executor import get_conversion_pool
+from .images import RecompressOptions, recompress_image
+
+
+ASSETS_DIRNAME = "assets"
+SUMMARY_FILENAME = "summary.json"
+
+# 图片 CDN 会拒绝带站外 Referer 的请求，这里只带 UA
+ASSET_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
+}
+
+CONTENT_TYPE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/svg+xml": ".svg",
+    "image/bmp": ".bmp",
+}
+
+# 正文中的 src 和懒加载的 data-src 属性，只改写已下载的图片地址
+IMAGE_SRC_PATTERN = re.compile(r'(\s(?:data-src|src)=")([^"]*)(")', re.IGNORECASE)
+
+
+class AssetPipeline:
+    """按内容哈希保存文章图片并把正文中的地址改写为本地相对路径
+
+    同一次下载(如一个合集)共用一个实例：相同 URL 只下载一次，
+    不同 URL 但内容相同的图片(页眉、二维码、签名图)只保存一份。
+    指定 recompress 时，新图片在转换进程池中缩放转码后再保存，
+    原始大小和最终大小记录在 assets/summary.json 中。
+    """
+
+    def __init__(self, output_dir: Path, concurrency: int = 8, timeout: float = 30,
+                 recompress: Optional[RecompressOptions] = None):
+        self.output_dir = Path(output_dir)
+        self.assets_dir = self.output_dir / ASSETS_DIRNAME
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.recompress = recompress
+        self._session: Optional[aiohttp.ClientSession] = None
+        # URL -> 本地相对路径(下载失败时为 None)，并发请求同一 URL 时共用一个任务
+        self._by_url: Dict[str, asyncio.Task] = {}
+        # 内容哈希(按原始数据计算) -> 保存任务，结果为本地相对路径
+        self._by_hash: Dict[str, asyncio.Task] = {}
+        # 本次新保存图片的压缩记录
+        self._summary: Dict[str, Dict] = {}
+        # 之前的下载已保存的文件，哈希前缀 -> 文件名，首次保存时扫描一次
+        self._existing: Optional[Dict[str, str]] = None
+        self.stats = {"images": 0, "stored": 0, "reused_urls": 0, "duplicates": 0, "failed": 0,
+                      "fetched_bytes": 0, "deduplicated_bytes": 0}
+
+    async def open(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, headers=ASSET_HEADERS,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def close(self):
+        if self._by_url:
+            await asyncio.gather(*self._by_url.values(), return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._summary:
+            await asyncio.to_thread(self._write_summary)
+        if self.stats["images"]:
+            self.report()
+
+    async def localize(self, document: ArticleDocument) -> ArticleDocument:
+        """下载文章中的图片并返回改写了图片地址的新文档"""
+        urls = [url for url in dict.fromkeys(document.images) if url.startswith(("http://", "https://", "//"))]
+        if not urls:
+            return document
+        await self.open()
+        paths = await asyncio.gather(*(self._resolve(url) for url in urls))
+        return rewrite_image_sources(document, {url: path for url, path in zip(urls, paths) if path})
+
+    def _resolve(self, url: str) -> asyncio.Task:
+        self.stats["images"] += 1
+        task = self._by_url.get(url)
+        if task is None:
+            task = self._by_url[url] = asyncio.ensure_future(self._download(url))
+        else:
+            self.stats["reused_urls"] += 1
+            task.add_done_callback(self._count_reused)
+        return task
+
+    def _count_reused(self, task: asyncio.Task):
+        if not task.cancelled() and not task.exception() and task.result():
+            self.stats["deduplicated_bytes"] += (self.output_dir / task.result()).stat().st_size
+
+    async def _download(self, url: str) -> Optional[str]:
+        try:
+            async with self._session.get(_absolute(url)) as response:
+                response.raise_for_status()
+                data = await response.read()
+                content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats["failed"] += 1
+            logger.info(f"下载图片失败({e})，保留原始地址: {url}")
+            return None
+
+        self.stats["fetched_bytes"] += len(data)
+        digest = hashlib.sha256(data).hexdigest()
+        task = self._by_hash.get(digest)
+        if task is None:
+            task = self._by_hash[digest] = asyncio.ensure_future(self._store(digest, url, data, content_type))
+        else:
+            self.stats["duplicates"] += 1
+            self.stats["deduplicated_bytes"] += len(data)
+        return await asyncio.shield(task)
+
+    async def _store(self, digest: str, url: str, data: bytes, content_type: str) -> str:
+        """保存一份新内容；之前的下载已保存过(扩展名可能因压缩而不同)时直接复用"""
+        stem = digest[:32]
+        if self._existing is None:
+            self._existing = {path.stem: path.name for path in self.assets_dir.glob("*.*")
+                              if path.name != SUMMARY_FILENAME} if self.assets_dir.exists() else {}
+        if stem in self._existing:
+            self.stats["duplicates"] += 1
+            self.stats["deduplicated_bytes"] += len(data)
+            return f"{ASSETS_DIRNAME}/{self._existing[stem]}"
+
+        final, extension = data, _guess_extension(url, content_type)
+        if self.recompress:
+            result = await self._recompress(url, data)
+            if result:
+                final, extension = result
+            self._summary[stem + extension] = {"source": url, "original_bytes": len(data),
+                                               "final_bytes": len(final)}
+        filename = stem + extension
+        self.assets_dir.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread((self.assets_dir / filename).write_bytes, final)
+        self.stats["stored"] += 1
+        return f"{ASSETS_DIRNAME}/{filename}"
+
+    async def _recompress(self, url: str, data: bytes):
+        """返回 (新数据, 扩展名)，不压缩或压缩失败时返回 None，由调用方保存原图"""
+        try:
+            return await get_conversion_pool().run(recompress_image, data, self.recompress)
+        except ImportError:
+            logger.info("未安装 Pillow，跳过图片压缩")
+            self.recompress = None
+            return None
+        except Exception as e:
+            # recompress_image 已处理无法解码的图片，这里兜底 Pillow 的其他错误和进程池异常
+            logger.info(f"图片压缩失败({type(e).__name__}: {e})，保存原图: {url}")
+            return None
+
+    def _write_summary(self):
+        """把本次压缩记录合并进 assets/summary.json，同一合集多次下载累计"""
+        summary_path = self.assets_dir / SUMMARY_FILENAME
+        images = {}
+        if summary_path.exists():
+            try:
+                images = json.loads(summary_path.read_text(encoding="utf-8")).get("images", {})
+            except (OSError, ValueError):
+                pass
+        images.update(self._summary)
+        original = sum(item["original_bytes"] for item in images.values())
+        final = sum(item["final_bytes"] for item in images.values())
+        summary = {
+            "options": dataclasses.asdict(self.recompress) if self.recompress else None,
+            "original_bytes": original,
+            "final_bytes": final,
+            "images": images,
+        }
+        summary_path.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+        logger.info(f"图片压缩: {len(images)} 张，{original / 1024:.1f} KB -> {final / 1024:.1f} KB")
+
+    def report(self):
+        stats = self.stats
+        logger.info(f"图片资源: 引用 {stats['images']} 次，新保存 {stats['stored']} 个，"
+                    f"URL 复用 {stats['reused_urls']} 次，内容重复 {stats['duplicates']} 次，失败 {stats['failed']} 个；"
+                    f"下载 {stats['fetched_bytes'] / 1024:.1f} KB，去重节省 {stats['deduplicated_bytes'] / 1024:.1f} KB")
+
+
+def rewrite_image_sources(document: ArticleDocument, local: Dict[str, str]) -> ArticleDocument:
+    """按 原始地址 -> 本地相对路径 改写正文中的图片地址，离线重新导出时也用它复用已保存的图片"""
+    if not local:
+        return document
+
+    def _rewrite(match):
+        url = html.unescape(match.group(2))
+        path = local.get(url) or local.get(_absolute(url))
+        return f"{match.group(1)}{path}{match.group(3)}" if path else match.group(0)
+
+    content_html = IMAGE_SRC_PATTERN.sub(_rewrite, document.content_html)
+    images = tuple(local.get(url, url) for url in document.images)
+    return document.with_content(content_html, images)
+
+
+def _absolute(url: str) -> str:
+    return "https:" + url if url.startswith("//") else url
+
+
+def _guess_extension(url: str, content_type: str) -> str:
+    """微信图片地址没有扩展名，格式在 wx_fmt 参数里"""
+    if content_type in CONTENT_TYPE_EXTENSIONS:
+        return CONTENT_TYPE_EXTENSIONS[content_type]
+    wx_fmt = parse_qs(urlparse(_absolute(url)).query).get("wx_fmt", [""])[0].lower()
+    if wx_fmt in ("jpeg", "jpg", "png", "gif", "webp", "bmp", "svg"):
+        return ".jpg" if wx_fmt == "jpeg" else f".{wx_fmt}"
+    return ".img"
@@ -1,17 +1,53 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
 from pathlib import Path
-from playwright.async_api import Page
-from typing import Optional
+from typing import TYPE_CHECKING, Optional, Sequence
 import re
+from app.routing import ALLOW_ALL, ResourcePolicy
 from app.utils.logger import logger
+from .document import MINIMAL_PRUNE, ArticleDocument, PruneOptions, extract_document
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
 
 
 class ArticleExporter(ABC):
     """文章导出器抽象基类"""
-    
-    @abstractmethod
+
+    # 加载文章页面时的资源拦截策略，子类按需要的资源覆盖
+    resource_policy: ResourcePolicy = ALLOW_ALL
+    # 序列化正文前在页面内执行的裁剪，默认只移除底部互动区域
+    prune_options: PruneOptions = MINIMAL_PRUNE
+    # 是否必须在加载好的浏览器页面上导出(如 PDF)，这类导出器在页面归还前调用 render_page
+    requires_page: bool = False
+    # 是否把一组文章合并为一个文件(如 EPUB)；继续中断的任务时，已完成的文章仍要交给这类导出器
+    collects_articles: bool = False
+
+    @property
+    def needs_images(self) -> bool:
+        """提取文章时是否需要等待图片加载"""
+        return "image" not in self.resource_policy.blocked_types
+
     async def export(self, page: Page, output_dir: Path, filename: Optional[str] = None) -> Path:
-        """将文章内容导出到指定格式的文件"""
+        """从已加载的页面提取文章并导出(兼容旧调用方式)"""
+        document = await extract_document(page, wait_for_images=self.needs_images, prune=self.prune_options)
+        return await self.render(document, output_dir, filename)
+
+    async def begin(self, output_dir: Path, title: str, links: Sequence[str] = ()):
+        """一组文章开始导出前调用，合并多篇文章的导出器(如 EPUB)在这里创建文件"""
+
+    async def finish(self):
+        """一组文章导出结束后调用，中途失败或取消时也会调用"""
+
+    async def render_page(self, page: Page, document: ArticleDocument, output_dir: Path,
+                          filename: Optional[str] = None) -> Path:
+        """在仍持有的页面上导出，默认与 render 相同"""
+        return await self.render(document, output_dir, filename)
+
+    @abstractmethod
+    async def render(self, document: ArticleDocument, output_dir: Path, filename: Optional[str] = None) -> Path:
+        """把文章写成目标格式，不依赖浏览器页面；requires_page 的导出器只能用 render_page，这里抛出 TypeError"""
         pass
 
     @abstractmethod
@@ -19,42 +55,14 @@ class ArticleExporter(ABC):
         """返回文件扩展名"""
         pass
 
-    async def _scroll_and_clean_page(self, page: Page):
-        """滚动页面并清理元素(公共实现)"""
-        await page.evaluate("""async () => {
-            await new Promise((resolve) => {
-                let scrollHeight = document.body.scrollHeight;
-                let currentPosition = 0;
-                const distance = 100;
-                const timer = setInterval(() => {
-                    window.scrollBy(0, distance);
-                    currentPosition += distance;
-                    if (currentPosition >= scrollHeight) {
-                        clearInterval(timer);
-                        resolve();
-                    }
-                }, 100);
-            });
-        }""")
-        
-        await page.evaluate("""() => {
-            const selectors = ["#content_bottom_area", "#content_bottom_interaction"];
-            selectors.forEach(selector => {
-                const element = document.querySelector(selector);
-                if (element) element.remove();
-            });
-        }""")
-
-    async def _generate_filename(self, page: Page) -> str:
+    def _generate_filename(self, document: ArticleDocument) -> str:
         """生成文件名(公共实现)"""
         file_extension  = self.get_file_extension()
         logger.info(f"实际文件扩展名：{file_extension}")
-        title_element = await page.query_selector(".rich_media_title")
-        if title_element:
-            title = (await title_element.text_content()).strip()
-            return self._sanitize_filename(title) + self.get_file_extension()
-        
-        return self._extract_title_from_url(page.url) + self.get_file_extension()
+        if document.title:
+            return self._sanitize_filename(document.title) + file_extension
+
+        return self._extract_title_from_url(document.source_url) + file_extension
 
     def _extract_title_from_url(self, url: str) -> str:
         """从URL提取标题"""
@@ -65,4 +73,4 @@ class ArticleExporter(ABC):
 
     def _sanitize_filename(self, filename: str) -> str:
         """清理文件名中的非法字符"""
-        return re.sub(r'[\\/:*?\"<>|]', '_', filename)
\ No newline at end of file
+        return re.sub(r'[\\/:*?\"<>|]', '_', filename)
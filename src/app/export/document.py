@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+from app.errors import ContentMissingError
+from app.utils.logger import logger
+
+
+@dataclass(frozen=True)
+class ArticleDocument:
+    """一次提取得到的文章内容，导出器只依赖它而不再操作浏览器页面"""
+    title: str
+    author: str
+    publish_time: str
+    content_html: str
+    images: Tuple[str, ...]
+    source_url: str
+
+    def with_content(self, content_html: str, images: Optional[Tuple[str, ...]] = None) -> "ArticleDocument":
+        """返回替换了正文(和图片列表)的新文档"""
+        return replace(self, content_html=content_html, images=self.images if images is None else images)
+
+
+# 解析懒加载图片：data-src 提升为 src，按需等待图片加载完成
+RESOLVE_LAZY_IMAGES_JS = """async ({waitForImages, timeout}) => {
+    const root = document.querySelector("#page-content") || document.body;
+    const images = Array.from(root.querySelectorAll("img"));
+    let promoted = 0;
+    for (const img of images) {
+        const real = img.getAttribute("data-src");
+        if (real && img.getAttribute("src") !== real) {
+            img.setAttribute("src", real);
+            promoted++;
+        }
+        img.removeAttribute("loading");
+    }
+    if (waitForImages) {
+        const pending = images.filter(img => img.getAttribute("src") && !img.complete);
+        await Promise.race([
+            Promise.all(pending.map(img => new Promise(resolve => {
+                img.addEventListener("load", resolve, {once: true});
+                img.addEventListener("error", resolve, {once: true});
+            }))),
+            new Promise(resolve => setTimeout(resolve, timeout)),
+        ]);
+    }
+    const unresolved = images.filter(img => !img.getAttribute("src")).length
+        + root.querySelectorAll("iframe[data-src]:not([src]), [data-lazy-bgimg]").length;
+    return {total: images.length, promoted, unresolved, scrollHeight: document.body.scrollHeight};
+}"""
+
+# 按视口高度滚动，每步等待一帧，总时长受 budget 限制
+ADAPTIVE_SCROLL_JS = """async (budget) => {
+    const deadline = performance.now() + budget;
+    const nextFrame = () => new Promise(resolve => requestAnimationFrame(() => setTimeout(resolve, 50)));
+    while (performance.now() < deadline) {
+        window.scrollBy(0, window.innerHeight);
+        await nextFrame();
+        if (window.innerHeight + window.scrollY >= document.body.scrollHeight) break;
+    }
+}"""
+
+@dataclass(frozen=True)
+class PruneOptions:
+    """序列化正文前在页面内执行的裁剪规则"""
+    # 整个移除的区域
+    remove_selectors: Tuple[str, ...] = ("#content_bottom_area", "#content_bottom_interaction")
+    # 去掉 style 属性
+    strip_styles: bool = True
+    # 去掉 class 和 data-* 等追踪/排版属性(保留 data-src)
+    strip_attributes: bool = True
+    # 移除装饰性 SVG
+    remove_svg: bool = True
+    # 移除不含文字和媒体的空包裹层
+    remove_empty: bool = True
+    # 展开没有任何属性的 span
+    unwrap_spans: bool = True
+
+    def merge(self, other: "PruneOptions") -> "PruneOptions":
+        """合并两个导出器的规则，只执行两者都允许的裁剪"""
+        return PruneOptions(
+            remove_selectors=tuple(s for s in self.remove_selectors if s in other.remove_selectors),
+            strip_styles=self.strip_styles and other.strip_styles,
+            strip_attributes=self.strip_attributes and other.strip_attributes,
+            remove_svg=self.remove_svg and other.remove_svg,
+            remove_empty=self.remove_empty and other.remove_empty,
+            unwrap_spans=self.unwrap_spans and other.unwrap_spans,
+        )
+
+    def within(self, other: "PruneOptions") -> bool:
+        """按本规则裁剪的结果是否仍然包含 other 需要保留的全部内容"""
+        return (set(self.remove_selectors) <= set(other.remove_selectors)
+                and (not self.strip_styles or other.strip_styles)
+                and (not self.strip_attributes or other.strip_attributes)
+                and (not self.remove_svg or other.remove_svg)
+                and (not self.remove_empty or other.remove_empty)
+                and (not self.unwrap_spans or other.unwrap_spans))
+
+
+# 只移除底部互动区域，保留原始排版
+MINIMAL_PRUNE = PruneOptions(strip_styles=False, strip_attributes=False, remove_svg=False,
+                             remove_empty=False, unwrap_spans=False)
+
+# 按规则裁剪正文后，一次求值取回导出需要的全部字段
+EXTRACT_DOCUMENT_JS = """(options) => {
+    options.removeSelectors.forEach(selector => {
+        document.querySelectorAll(selector).forEach(element => element.remove());
+    });
+    const content = document.querySelector("#page-content");
+    if (!content) return null;
+    const originalSize = content.innerHTML.length;
+
+    if (options.removeSvg) {
+        content.querySelectorAll("svg").forEach(element => element.remove());
+    }
+    if (options.stripStyles || options.stripAttributes) {
+        const keep = new Set(["src", "data-src", "href", "alt", "title", "colspan", "rowspan", "data-lang"]);
+        content.querySelectorAll("*").forEach(element => {
+            for (const {name} of Array.from(element.attributes)) {
+                if (name === "style" ? options.stripStyles
+                    : options.stripAttributes && !keep.has(name) && !(element.tagName === "PRE" && name === "class")) {
+                    element.removeAttribute(name);
+                }
+            }
+        });
+    }
+    if (options.unwrapSpans) {
+        content.querySelectorAll("span").forEach(span => {
+            if (!span.attributes.length) span.replaceWith(...span.childNodes);
+        });
+    }
+    if (options.removeEmpty) {
+        const media = "img, video, iframe, br, hr, table, pre, code";
+        // 自底向上移除，外层包裹在内层被删除后也可能变空
+        Array.from(content.querySelectorAll("section, p, span, div, strong, em")).reverse().forEach(element => {
+            if (!element.textContent.trim() && !element.querySelector(media)) element.remove();
+        });
+    }
+
+    const text = selector => {
+        const element = document.querySelector(selector);
+        return element ? element.textContent.trim() : "";
+    };
+    const contentHtml = content.innerHTML;
+    return {
+        title: text(".rich_media_title") || text("#activity-name"),
+        author: text("#js_name") || text(".rich_media_meta_nickname"),
+        publish_time: text("#publish_time"),
+        content_html: contentHtml,
+        images: Array.from(content.querySelectorAll("img"))
+            .map(img => img.getAttribute("src"))
+            .filter(src => src && !src.startsWith("data:")),
+        source_url: location.href,
+        original_size: originalSize,
+    };
+}"""
+
+
+async def resolve_lazy_images(page: Page, wait_for_images: bool = True, image_wait_timeout: float = 10.0,
+                              scroll_budget: float = 5.0):
+    """解析懒加载图片
+
+    先直接把 data-src 提升为 src，只等待真正需要的图片请求；
+    仍有未解析的懒加载元素时，才退回到限时的自适应滚动。
+    """
+    started = time.perf_counter()
+    result = await page.evaluate(RESOLVE_LAZY_IMAGES_JS, {"waitForImages": wait_for_images,
+                                                          "timeout": int(image_wait_timeout * 1000)})
+    if result["unresolved"]:
+        logger.info(f"仍有 {result['unresolved']} 个懒加载元素未解析，退回自适应滚动")
+        await page.evaluate(ADAPTIVE_SCROLL_JS, int(scroll_budget * 1000))
+
+    # 旧实现每 100ms 滚动 100px，按页面高度估算节省的时间
+    elapsed = time.perf_counter() - started
+    legacy_cost = result["scrollHeight"] / 100 * 0.1
+    logger.info(f"懒加载图片处理完成: 提升 {result['promoted']} / {result['total']} 张，"
+                f"用时 {elapsed:.2f}s，比逐步滚动节省约 {max(legacy_cost - elapsed, 0):.1f}s")
+
+
+async def extract_document(page: Page, wait_for_images: bool = True, image_wait_timeout: float = 10.0,
+                           scroll_budget: float = 5.0, prune: PruneOptions = PruneOptions()) -> ArticleDocument:
+    """从已加载的文章页面提取 ArticleDocument，之后页面即可用于下一篇文章"""
+    await resolve_lazy_images(page, wait_for_images, image_wait_timeout, scroll_budget)
+    data = await page.evaluate(EXTRACT_DOCUMENT_JS, {
+        "removeSelectors": list(prune.remove_selectors),
+        "stripStyles": prune.strip_styles,
+        "stripAttributes": prune.strip_attributes,
+        "removeSvg": prune.remove_svg,
+        "removeEmpty": prune.remove_empty,
+        "unwrapSpans": prune.unwrap_spans,
+    })
+    if not data:
+        raise ContentMissingError("未找到 #page-content 元素！", page.url)
+    logger.info(f"正文裁剪: {data['original_size'] // 1024} KB -> {len(data['content_html']) // 1024} KB")
+    return ArticleDocument(
+        title=data["title"],
+        author=data["author"],
+        publish_time=data["publish_time"],
+        content_html=data["content_html"],
+        images=tuple(data["images"]),
+        source_url=data["source_url"],
+    )
@@ -0,0 +1,253 @@
+import os
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from html import escape
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from app.routing import TEXT_ONLY
+from app.utils.logger import logger
+from .assets import ASSETS_DIRNAME
+from .base import ArticleExporter
+from .document import ArticleDocument, PruneOptions
+from .executor import get_conversion_pool
+
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+DROPPED_TAGS = {"script", "style", "iframe", "noscript", "mpvoice", "mpvideo", "svg"}
+# 阅读器不会加载远程图片，EPUB 校验也不允许未声明的远程资源；没有本地化(或下载失败)的图片直接去掉
+REMOTE_PREFIXES = ("http://", "https://", "//")
+IMAGE_MEDIA_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".gif": "image/gif",
+                     ".webp": "image/webp", ".svg": "image/svg+xml", ".bmp": "image/bmp"}
+
+CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>"""
+
+STYLESHEET = """body { font-family: serif; line-height: 1.6; }
+h1 { font-size: 1.5em; }
+.meta { color: #888; font-size: 0.9em; }
+img { max-width: 100%; height: auto; }
+pre { white-space: pre-wrap; }
+blockquote { border-left: 3px solid #ddd; margin-left: 0; padding-left: 1em; color: #666; }"""
+
+
+class _XhtmlWriter(HTMLParser):
+    """把浏览器序列化的 HTML 片段整理为 EPUB 要求的 XHTML：闭合空元素、补齐未闭合标签
+
+    从 Word 粘贴的 o:p、st1:chsdate 等带前缀的标签没有命名空间声明，去掉标签保留内容。
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts: List[str] = []
+        self._stack: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_depth or tag in DROPPED_TAGS:
+            self._skip_depth += tag in DROPPED_TAGS
+            return
+        if ":" in tag:
+            return
+        if tag == "img" and (dict(attrs).get("src") or "").strip().startswith(REMOTE_PREFIXES):
+            return
+        seen = set()
+        rendered = []
+        for name, value in attrs:
+            # XML 属性名不能重复，也不能包含特殊字符
+            # srcset 里的远程地址同样不可用
+            if name in seen or name == "srcset" or not name.replace("-", "").replace("_", "").isalnum():
+                continue
+            seen.add(name)
+            rendered.append(f' {name}="{escape(value or "", quote=True)}"')
+        if tag in VOID_TAGS:
+            self._parts.append(f"<{tag}{''.join(rendered)}/>")
+        else:
+            self._parts.append(f"<{tag}{''.join(rendered)}>")
+            self._stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and not self._skip_depth and self._stack and self._stack[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self._skip_depth:
+            self._skip_depth -= tag in DROPPED_TAGS
+            return
+        if ":" in tag or tag not in self._stack:
+            return
+        while self._stack:
+            current = self._stack.pop()
+            self._parts.append(f"</{current}>")
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(escape(data, quote=False))
+
+    def result(self) -> str:
+        self.close()
+        while self._stack:
+            self._parts.append(f"</{self._stack.pop()}>")
+        return "".join(self._parts)
+
+
+def html_to_xhtml(article_html: str) -> str:
+    """在转换进程池中执行"""
+    writer = _XhtmlWriter()
+    writer.feed(article_html)
+    return writer.result()
+
+
+class EpubExporter(ArticleExporter):
+    """把一组文章(通常是整个合集)写成一本 EPUB
+
+    每篇文章下载完成后立即作为一章追加进 zip，内存中只保留章节目录；
+    图片按资源管线的内容哈希文件名在包内只保存一份。
+    写入过程中的文件名是 <书名>.epub.part，目录(content.opf / nav.xhtml)在 finish 时写入后才换成正式文件名：
+    中途失败或取消的下载同样得到可以打开的书，进程被杀或崩溃只留下 .part，不会覆盖上一次完整的书。
+    继续中断的任务时，已完成的文章从文章缓存重新收录，整本书重新生成。
+    """
+    # 图片由资源管线下载，页面只需要正文 DOM
+    resource_policy = TEXT_ONLY
+    prune_options = PruneOptions()
+    collects_articles = True
+
+    def __init__(self):
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._path: Optional[Path] = None
+        self._part_path: Optional[Path] = None
+        self._title = ""
+        # 合集顺序，边解析边下载时这个列表会继续增长，到 finish 时才完整
+        self._links: Sequence[str] = ()
+        self._chapters: List[Dict] = []
+        self._images: Dict[str, str] = {}
+
+    def get_file_extension(self) -> str:
+        return ".epub"
+
+    async def begin(self, output_dir: Path, title: str, links: Sequence[str] = ()):
+        self._title = title
+        self._links = links
+        self._path = Path(output_dir) / self._sanitize_filename(f"{title}{self.get_file_extension()}")
+        self._part_path = self._path.with_name(self._path.name + ".part")
+        self._zip = zipfile.ZipFile(self._part_path, "w", compression=zipfile.ZIP_DEFLATED)
+        # mimetype 必须是第一个文件且不压缩
+        self._zip.writestr(zipfile.ZipInfo("mimetype"), "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        self._zip.writestr("META-INF/container.xml", CONTAINER_XML)
+        self._zip.writestr("OEBPS/style.css", STYLESHEET)
+        logger.info(f"开始写入 EPUB: {self._path}")
+
+    async def render(self, document: ArticleDocument, output_dir: Path, filename: Optional[str] = None) -> Path:
+        """把文章作为新的一章追加进 EPUB"""
+        if self._zip is None:
+            # 没有经过 begin 的单篇导出，以文章标题作为书名
+            await self.begin(output_dir, document.title or self._extract_title_from_url(document.source_url))
+        body = await get_conversion_pool().run(html_to_xhtml, document.content_html)
+        remote = sum(src.startswith(REMOTE_PREFIXES) for src in document.images)
+        if remote:
+            logger.info(f"EPUB 不引用远程图片，去掉未本地化的图片 {remote} 张: {document.title or document.source_url}")
+
+        # 以下没有 await，多个下载任务并发调用时章节写入不会交错
+        body = self._embed_images(body, document, Path(output_dir))
+        index = len(self._chapters) + 1
+        href = f"chapters/{index:05d}.xhtml"
+        title = document.title or f"第 {index} 篇"
+        meta = " · ".join(part for part in (document.author, document.publish_time) if part)
+        self._zip.writestr(f"OEBPS/{href}", f"""<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="zh-CN">
+<head><meta charset="UTF-8"/><title>{escape(title)}</title><link rel="stylesheet" href="../style.css"/></head>
+<body>
+<h1>{escape(title)}</h1>
+<p class="meta">{escape(meta)}</p>
+{body}
+</body>
+</html>""")
+        self._chapters.append({"id": f"c{index:05d}", "href": href, "title": title,
+                               "source": document.source_url, "index": index})
+        return self._path
+
+    def _embed_images(self, body: str, document: ArticleDocument, output_dir: Path) -> str:
+        """把资源管线保存的本地图片放进包内，同名(同内容)只写一次"""
+        for src in document.images:
+            if not src.startswith(ASSETS_DIRNAME + "/"):
+                continue
+            name = src[len(ASSETS_DIRNAME) + 1:]
+            if name not in self._images:
+                source = output_dir / src
+                if not source.exists():
+                    continue
+                self._zip.write(source, f"OEBPS/images/{name}", compress_type=zipfile.ZIP_STORED)
+                self._images[name] = IMAGE_MEDIA_TYPES.get(Path(name).suffix.lower(), "image/jpeg")
+            body = body.replace(f'"{src}"', f'"../images/{name}"')
+        return body
+
+    async def finish(self):
+        """写入目录并关闭文件，下载中途失败时同样调用"""
+        if self._zip is None:
+            return
+        book, self._zip = self._zip, None
+        try:
+            # 按合集顺序排列，找不到的章节按完成顺序排在后面
+            order = {link: position for position, link in enumerate(self._links)}
+            chapters = sorted(self._chapters,
+                              key=lambda chapter: order.get(chapter["source"], len(order) + chapter["index"]))
+            book.writestr("OEBPS/nav.xhtml", self._nav(chapters))
+            book.writestr("OEBPS/content.opf", self._opf(chapters))
+        finally:
+            book.close()
+        if not chapters:
+            # 一章都没有(如全部下载失败)时保留上一次的书
+            self._part_path.unlink(missing_ok=True)
+            logger.info(f"没有下载成功的文章，未生成 EPUB: {self._path}")
+            return
+        os.replace(self._part_path, self._path)
+        logger.info(f"EPUB 已生成: {self._path}，共 {len(chapters)} 章，图片 {len(self._images)} 张")
+
+    def _nav(self, chapters: List[Dict]) -> str:
+        items = "\n".join(f'<li><a href="{chapter["href"]}">{escape(chapter["title"])}</a></li>'
+                          for chapter in chapters)
+        return f"""<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="zh-CN">
+<head><meta charset="UTF-8"/><title>{escape(self._title)}</title></head>
+<body>
+<nav epub:type="toc" id="toc"><h1>{escape(self._title)}</h1><ol>
+{items}
+</ol></nav>
+</body>
+</html>"""
+
+    def _opf(self, chapters: List[Dict]) -> str:
+        manifest = ['<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>',
+                    '<item id="css" href="style.css" media-type="text/css"/>']
+        manifest += [f'<item id="{chapter["id"]}" href="{chapter["href"]}" media-type="application/xhtml+xml"/>'
+                     for chapter in chapters]
+        manifest += [f'<item id="img{index}" href="images/{name}" media-type="{media_type}"/>'
+                     for index, (name, media_type) in enumerate(self._images.items())]
+        spine = "\n".join(f'<itemref idref="{chapter["id"]}"/>' for chapter in chapters)
+        modified = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        return f"""<?xml version="1.0" encoding="UTF-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id">
+<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+<dc:identifier id="book-id">urn:uuid:{uuid.uuid4()}</dc:identifier>
+<dc:title>{escape(self._title)}</dc:title>
+<dc:language>zh-CN</dc:language>
+<meta property="dcterms:modified">{modified}</meta>
+</metadata>
+<manifest>
+{chr(10).join(manifest)}
+</manifest>
+<spine>
+{spine}
+</spine>
+</package>"""
@@ -0,0 +1,64 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+from weakref import WeakKeyDictionary
+
+from app.utils.logger import logger
+
+
+class ConversionPool:
+    """有界进程池：CPU 密集的导出步骤(如 html2text)在子进程中执行
+
+    同时排队的任务数不超过 max_pending，超出时调用方等待，形成背压，
+    避免下载速度远快于转换速度时在内存里堆积大量 HTML。
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 2
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # 信号量与事件循环绑定，每个循环各自一份
+        self._slots: "WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = WeakKeyDictionary()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 浏览器服务线程和 Qt 界面线程都在运行，fork 会把它们的锁状态复制进子进程，统一用 spawn
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"转换进程池已启动，进程数: {self.max_workers}")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """在进程池中执行 fn(*args)，fn 和参数必须可以被 pickle"""
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_pending)
+        async with slots:
+            return await loop.run_in_executor(self._get_executor(), partial(fn, *args))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_pool: Optional[ConversionPool] = None
+
+
+def get_conversion_pool() -> ConversionPool:
+    """返回进程内共享的转换进程池"""
+    global _pool
+    if _pool is None:
+        _pool = ConversionPool()
+    return _pool
+
+
+def shutdown_conversion_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
@@ -1,28 +1,77 @@
-from typing import Dict, Optional, Type
+import importlib
+from typing import Dict, Iterable, List, Optional, Type, Union
 from .base import ArticleExporter
-from .md import MarkdownExporter
-from .html import HTMLExporter
-# from .pdf import PDFExporter
 from app.utils.logger import logger
 class ExporterFactory:
-    """导出器工厂，管理各种导出格式"""
+    """导出器工厂，管理各种导出格式
+
+    内置格式以 "模块:类名" 登记，第一次使用时才导入对应模块(及 html2text、aiohttp 等依赖)。
+    Playwright 同理只在 BrowserManager 启动浏览器时导入；导出器和下载模块只在
+    `if TYPE_CHECKING:` 中导入 Page 等类型，配合 `from __future__ import annotations` 用于类型标注。
+    """
     
-    _exporters: Dict[str, Type[ArticleExporter]] = {
-        "md": MarkdownExporter,
-        "markdown": MarkdownExporter,
-        "html": HTMLExporter,
-        # "pdf": lambda: PDFExporter(wkhtmltopdf_path="D:/wkhtmltopdf/bin/wkhtmltopdf.exe"),
+    _exporters: Dict[str, Union[str, Type[ArticleExporter]]] = {
+        "md": "app.export.md:MarkdownExporter",
+        "markdown": "app.export.md:MarkdownExporter",
+        "html": "app.export.html:HTMLExporter",
+        # 微信专用转换引擎，输出仍为 .md
+        "md-wechat": "app.export.wechat_md:WechatMarkdownExporter",
+        "markdown-wechat": "app.export.wechat_md:WechatMarkdownExporter",
+        # 直接打印已加载的浏览器页面
+        "pdf": "app.export.pdf:PDFExporter",
+        # 一组文章(合集)合并为一本电子书
+        "epub": "app.export.epub:EpubExporter",
     }
+
+    @classmethod
+    def _resolve(cls, format_type: str) -> Optional[Type[ArticleExporter]]:
+        """返回格式对应的导出器类，按需导入模块"""
+        exporter_class = cls._exporters.get(format_type.lower())
+        if isinstance(exporter_class, str):
+            module_name, class_name = exporter_class.split(":")
+            exporter_class = getattr(importlib.import_module(module_name), class_name)
+            cls._exporters[format_type.lower()] = exporter_class
+        return exporter_class
     
     @classmethod
     def create(cls, format_type: str) -> ArticleExporter:
         """创建指定类型的导出器"""
         logger.info(f"类型：{format_type.lower()}")
-        exporter_class = cls._exporters.get(format_type.lower())
+        exporter_class = cls._resolve(format_type)
         if not exporter_class:
             raise ValueError(f"不支持的导出格式: {format_type}")
         return exporter_class()
     
+    @classmethod
+    def create_many(cls, format_types: Union[str, Iterable[str]]) -> List[ArticleExporter]:
+        """创建多个导出器，支持 "md,html" 或列表；同一导出器的别名只创建一次
+
+        不同导出器写出同一种扩展名(如 md 和 md-wechat)时文件会互相覆盖，抛出 ValueError。
+        """
+        if isinstance(format_types, str):
+            format_types = format_types.split(",")
+        exporters: List[ArticleExporter] = []
+        seen = set()
+        extensions: Dict[str, str] = {}
+        for format_type in format_types:
+            format_type = format_type.strip()
+            if not format_type:
+                continue
+            exporter_class = cls._resolve(format_type)
+            if exporter_class in seen:
+                continue
+            exporter = cls.create(format_type)
+            extension = exporter.get_file_extension()
+            if extension in extensions:
+                raise ValueError(f"导出格式 {extensions[extension]} 和 {format_type} 都输出 {extension} 文件，"
+                                 f"会互相覆盖，只能选择其中一个")
+            extensions[extension] = format_type
+            exporters.append(exporter)
+            seen.add(exporter_class)
+        if not exporters:
+            raise ValueError("未指定导出格式")
+        return exporters
+
     @classmethod
     def register_format(cls, format_type: str, exporter_class: Type[ArticleExporter]):
         """注册新的导出格式"""
@@ -1,31 +1,25 @@
 from pathlib import Path
-from playwright.async_api import Page
 from typing import Optional
+from app.routing import WITH_IMAGES
 from .base import ArticleExporter
+from .document import ArticleDocument
 from app.utils.logger import logger
 class HTMLExporter(ArticleExporter):
-    
+    resource_policy = WITH_IMAGES
+
     def get_file_extension(self) -> str:
         return ".html"
     
-    async def export(self, page: Page, output_dir: Path, filename: Optional[str] = None) -> Path:
+    async def render(self, document: ArticleDocument, output_dir: Path, filename: Optional[str] = None) -> Path:
         """导出为HTML格式"""
-        await self._scroll_and_clean_page(page)
-        
         file_extension = self.get_file_extension()
-        
+
         logger.info(f"目标文件扩展名： {file_extension}")
-        
-        filename = filename or await self._generate_filename(page)
+
+        filename = filename or self._generate_filename(document)
         logger.info(f"生成文件名...{filename}")
-        content_div = await page.query_selector("#page-content")
-        
-        if not content_div:
-            raise Exception("未找到 #page-content 元素！")
-        
-        article_html = await content_div.inner_html()
-        styled_html = self._wrap_html(article_html, filename)
-        
+        styled_html = self._wrap_html(document.content_html, filename)
+
         output_path = output_dir / Path(filename)
         output_path.write_text(styled_html, encoding="utf-8")
         return output_path
@@ -0,0 +1,68 @@
+import io
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+FORMAT_EXTENSIONS = {"webp": ".webp", "jpeg": ".jpg", "png": ".png"}
+
+
+@dataclass(frozen=True)
+class RecompressOptions:
+    """图片压缩参数：超过 max_width 的图片等比缩小，并转成指定格式"""
+    max_width: Optional[int] = 1080
+    format: str = "webp"
+    quality: int = 80
+
+    def __post_init__(self):
+        if self.format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"不支持的图片格式: {self.format}")
+
+
+def recompress_image(data: bytes, options: RecompressOptions) -> Optional[Tuple[bytes, str]]:
+    """缩放并转码一张图片，在转换进程池中执行
+
+    返回 (新数据, 扩展名)；动图、无法解码的图片，以及结果反而更大且无需缩放时返回 None，保留原图。
+    """
+    from PIL import Image
+
+    # 截断或损坏的图片可能在解码、缩放或编码时才报错(UnidentifiedImageError 也是 OSError)，都保留原图
+    try:
+        return _recompress(data, options)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def _recompress(data: bytes, options: RecompressOptions) -> Optional[Tuple[bytes, str]]:
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    if getattr(image, "n_frames", 1) > 1:
+        return None
+
+    resized = bool(options.max_width and image.width > options.max_width)
+    if resized:
+        height = round(image.height * options.max_width / image.width)
+        image = image.resize((options.max_width, height), Image.LANCZOS)
+
+    if options.format == "jpeg":
+        # JPEG 没有透明通道，透明部分铺白底
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+        image = image.convert("RGBA")
+
+    output = io.BytesIO()
+    save_options = {"optimize": True}
+    if options.format != "png":
+        save_options["quality"] = options.quality
+    image.save(output, format=options.format.upper(), **save_options)
+    result = output.getvalue()
+    if len(result) >= len(data) and not resized:
+        return None
+    return result, FORMAT_EXTENSIONS[options.format]
@@ -1,30 +1,40 @@
 import html2text
 from pathlib import Path
-from playwright.async_api import Page
 from typing import Optional
+from app.routing import TEXT_ONLY
 from .base import ArticleExporter
+from .document import ArticleDocument, PruneOptions
+from .executor import get_conversion_pool
+
+# 子进程内复用的转换器
+_converter: Optional[html2text.HTML2Text] = None
+
+
+def html_to_markdown(article_html: str) -> str:
+    """html2text 转换，在转换进程池中执行"""
+    global _converter
+    if _converter is None:
+        _converter = html2text.HTML2Text()
+        _converter.ignore_links = False
+    return _converter.handle(article_html)
+
 
 class MarkdownExporter(ArticleExporter):
-    def __init__(self):
-        self._converter = html2text.HTML2Text()
-        self._converter.ignore_links = False
-    
+    # Markdown 只需要 #page-content 的 DOM，图片保留原始链接即可
+    resource_policy = TEXT_ONLY
+    # Markdown 不需要样式和装饰，全部裁掉
+    prune_options = PruneOptions()
+    # 转换函数在子进程中执行，必须是模块级函数
+    convert = staticmethod(html_to_markdown)
+
     def get_file_extension(self) -> str:
         return ".md"
-    
-    async def export(self, page: Page, output_dir: Path, filename: Optional[str] = None) -> Path:
+
+    async def render(self, document: ArticleDocument, output_dir: Path, filename: Optional[str] = None) -> Path:
         """导出为Markdown格式"""
-        await self._scroll_and_clean_page(page)
-        
-        filename = filename or await self._generate_filename(page)
-        content_div = await page.query_selector("#page-content")
-        
-        if not content_div:
-            raise Exception("未找到 #page-content 元素！")
-        
-        article_html = await content_div.inner_html()
-        markdown_content = self._converter.handle(article_html)
-        
+        filename = filename or self._generate_filename(document)
+        markdown_content = await get_conversion_pool().run(self.convert, document.content_html)
+
         output_path = output_dir / Path(filename)
         output_path.write_text(markdown_content, encoding="utf-8")
-        return output_path
\ No newline at end of file
+        return output_path
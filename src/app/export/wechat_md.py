@@ -0,0 +1,286 @@
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+from .md import MarkdownExporter
+
+
+# 内容整体丢弃的标签
+SKIP_TAGS = {"script", "style", "svg", "noscript", "mpvoice", "mpvideo", "iframe", "title", "head"}
+# 触发段落切分的块级标签
+BLOCK_TAGS = {"p", "div", "section", "article", "header", "footer", "figure", "figcaption", "center", "h1",
+              "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "blockquote", "pre", "table", "hr"}
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+CELL_TAGS = ("td", "th")
+EMPHASIS_TAGS = {"strong": "**", "b": "**", "em": "*", "i": "*", "del": "~~", "s": "~~"}
+
+WHITESPACE = re.compile(r"[ \t\r\n\u00a0\u3000]+")
+INVISIBLE = re.compile(r"[\u200b\u200c\u200d\ufeff]")
+MARKDOWN_SPECIALS = re.compile(r"([\\`*_])")
+# 行内缓冲区中代表 <br> 的占位符，与源码中的换行区分
+LINE_BREAK = "\x00"
+# 行首会被当成列表、引用、标题或分隔线的普通文字，与 html2text 一样加反斜杠转义
+LINE_START_QUOTE = re.compile(r"^>")
+LINE_START_MARKER = re.compile(r"^(?:[-+]|#{1,6})(?=\s|$)")
+LINE_START_ORDERED = re.compile(r"^(\d+)([.)])(?=\s|$)")
+LINE_START_RULE = re.compile(r"^(?:-{3,}|={3,})$")
+
+
+class WechatMarkdownConverter(HTMLParser):
+    """面向微信文章结构的单遍 HTML -> Markdown 转换器
+
+    只做一次流式遍历：忽略所有内联样式和装饰性包裹层，
+    直接识别段落、标题、强调、链接、懒加载图片、列表、引用、表格和代码块。
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._blocks: List[str] = []
+        self._inline: List[str] = []
+        self._skip_depth = 0
+        self._quote_depth = 0
+        self._lists: List[List] = []  # [类型, 序号]
+        self._list_marker: Optional[str] = None
+        self._heading = 0
+        self._links: List[Tuple[int, str]] = []
+        self._emphasis: List[Tuple[int, str]] = []
+        # <pre> 之外的行内代码在 _inline 中的起点
+        self._code: Optional[int] = None
+        self._pre_lines: Optional[List[str]] = None
+        self._pre_lang = ""
+        self._table: Optional[List[List[str]]] = None
+        self._cell_start: Optional[int] = None
+
+    def convert(self, html: str) -> str:
+        """转换完整的 HTML 片段"""
+        self.feed(html)
+        self.close()
+        return self.result()
+
+    def result(self) -> str:
+        self._flush()
+        return "\n\n".join(self._blocks).strip() + "\n"
+
+    # ---- 解析回调 ----
+
+    def handle_starttag(self, tag: str, attrs):
+        if self._skip_depth or tag in SKIP_TAGS:
+            if tag in SKIP_TAGS:
+                self._skip_depth += 1
+            return
+        attributes: Dict[str, str] = {k: v or "" for k, v in attrs}
+
+        if self._pre_lines is not None:
+            # 微信代码块每一行是一个 <code>
+            if tag in ("code", "br") and self._pre_lines[-1]:
+                self._pre_lines.append("")
+            return
+
+        if tag in CELL_TAGS and self._table is not None:
+            self._cell_start = len(self._inline)
+            return
+        if tag == "tr" and self._table is not None:
+            self._table.append([])
+            return
+        if tag == "table":
+            self._flush()
+            self._table = []
+            return
+
+        if tag in BLOCK_TAGS and self._table is None:
+            self._flush()
+        if self._code is not None and (tag in EMPHASIS_TAGS or tag in ("a", "code")):
+            # 代码里的强调和链接按原文输出
+            return
+        if tag in HEADING_TAGS:
+            self._heading = HEADING_TAGS[tag]
+        elif tag == "code":
+            self._code = len(self._inline)
+        elif tag in EMPHASIS_TAGS:
+            self._emphasis.append((len(self._inline), EMPHASIS_TAGS[tag]))
+        elif tag == "a":
+            self._links.append((len(self._inline), attributes.get("href", "")))
+        elif tag == "img":
+            src = attributes.get("data-src") or attributes.get("src", "")
+            if src and not src.startswith("data:"):
+                alt = WHITESPACE.sub(" ", attributes.get("alt", "")).strip()
+                self._inline.append(f"![{alt}]({src})")
+        elif tag == "br":
+            self._inline.append(LINE_BREAK)
+        elif tag == "hr":
+            self._blocks.append("---")
+        elif tag == "blockquote":
+            self._quote_depth += 1
+        elif tag in ("ul", "ol"):
+            self._lists.append([tag, 0])
+        elif tag == "li":
+            if self._lists:
+                current = self._lists[-1]
+                current[1] += 1
+                indent = "  " * (len(self._lists) - 1)
+                self._list_marker = indent + (f"{current[1]}. " if current[0] == "ol" else "- ")
+            else:
+                self._list_marker = "- "
+        elif tag == "pre":
+            self._pre_lines = [""]
+            classes = attributes.get("class", "")
+            match = re.search(r"code-snippet__(\w+)", classes)
+            self._pre_lang = attributes.get("data-lang") or (match.group(1) if match else "")
+
+    def handle_endtag(self, tag: str):
+        if self._skip_depth:
+            if tag in SKIP_TAGS:
+                self._skip_depth -= 1
+            return
+
+        if self._pre_lines is not None:
+            if tag == "pre":
+                code = "\n".join(self._pre_lines).strip("\n")
+                self._blocks.append(self._quote(f"```{self._pre_lang}\n{code}\n```"))
+                self._pre_lines = None
+            return
+
+        if self._table is not None:
+            if tag in CELL_TAGS and self._cell_start is not None:
+                cell = self._collapse("".join(self._inline[self._cell_start:])).replace("|", "\\|")
+                del self._inline[self._cell_start:]
+                self._cell_start = None
+                if self._table:
+                    self._table[-1].append(cell)
+                return
+            if tag == "table":
+                self._flush_table()
+                return
+            if tag not in ("a", "code") and tag not in EMPHASIS_TAGS:
+                return
+
+        if self._code is not None and (tag in EMPHASIS_TAGS or tag == "a"):
+            return
+        if tag == "code":
+            if self._code is not None:
+                self._close_code(self._code)
+                self._code = None
+        elif tag in EMPHASIS_TAGS and self._emphasis:
+            self._close_emphasis(*self._emphasis.pop())
+        elif tag == "a" and self._links:
+            self._close_link(*self._links.pop())
+        elif tag == "blockquote":
+            self._flush()
+            self._quote_depth = max(self._quote_depth - 1, 0)
+        elif tag in ("ul", "ol"):
+            self._flush()
+            if self._lists:
+                self._lists.pop()
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            if tag in HEADING_TAGS:
+                self._heading = 0
+
+    def handle_data(self, data: str):
+        if self._skip_depth:
+            return
+        data = INVISIBLE.sub("", data)
+        if self._pre_lines is not None:
+            lines = data.replace("\u00a0", " ").split("\n")
+            self._pre_lines[-1] += lines[0]
+            self._pre_lines.extend(lines[1:])
+            return
+        if data:
+            self._inline.append(data if self._code is not None else MARKDOWN_SPECIALS.sub(r"\\\1", data))
+
+    # ---- 输出 ----
+
+    def _collapse(self, text: str) -> str:
+        return WHITESPACE.sub(" ", text).strip()
+
+    def _close_emphasis(self, start: int, marker: str):
+        text = "".join(self._inline[start:])
+        del self._inline[start:]
+        if text.strip():
+            # 标记必须紧贴文字，空白移到标记外
+            leading = " " if text[:1].isspace() else ""
+            trailing = " " if text[-1:].isspace() else ""
+            self._inline.append(f"{leading}{marker}{text.strip()}{marker}{trailing}")
+
+    def _close_code(self, start: int, _=None):
+        text = self._collapse("".join(self._inline[start:]))
+        del self._inline[start:]
+        if not text:
+            return
+        # 代码本身含反引号时用更长的反引号包住
+        fence = "`" * (max((len(run) for run in re.findall(r"`+", text)), default=0) + 1)
+        padding = " " if text.startswith("`") or text.endswith("`") else ""
+        self._inline.append(f"{fence}{padding}{text}{padding}{fence}")
+
+    def _close_link(self, start: int, href: str):
+        text = self._collapse("".join(self._inline[start:]))
+        del self._inline[start:]
+        if href and text and not href.startswith("javascript:"):
+            self._inline.append(f"[{text}]({href})")
+        else:
+            self._inline.append(text)
+
+    def _escape_line_start(self, line: str) -> str:
+        if LINE_START_QUOTE.match(line) or LINE_START_MARKER.match(line) or LINE_START_RULE.match(line):
+            return "\\" + line
+        return LINE_START_ORDERED.sub(r"\1\\\2", line, count=1)
+
+    def _flush(self):
+        """把当前行内内容作为一个段落输出
+
+        <strong>、<a> 包住多个段落(微信常见的加粗整段、链接卡片)时，在段落边界先闭合标记，
+        下一段从头重新打开，每段各自成对。
+        """
+        if not self._inline:
+            return
+        # 由内向外闭合未结束的强调和链接
+        pending = [(start, self._close_emphasis, marker) for start, marker in self._emphasis]
+        pending += [(start, self._close_link, href) for start, href in self._links]
+        if self._code is not None:
+            pending.append((self._code, self._close_code, None))
+        for start, close, value in sorted(pending, key=lambda entry: entry[0], reverse=True):
+            close(start, value)
+        self._emphasis = [(0, marker) for _, marker in self._emphasis]
+        self._links = [(0, href) for _, href in self._links]
+        if self._code is not None:
+            self._code = 0
+
+        lines = [self._escape_line_start(self._collapse(line)) for line in "".join(self._inline).split(LINE_BREAK)]
+        self._inline = []
+        text = "  \n".join(line for line in lines if line)
+        if not text:
+            return
+        if self._heading:
+            text = "#" * self._heading + " " + text.replace("  \n", " ")
+            self._heading = 0
+        if self._list_marker is not None:
+            text = self._list_marker + text
+            self._list_marker = None
+        self._blocks.append(self._quote(text))
+
+    def _quote(self, text: str) -> str:
+        if not self._quote_depth:
+            return text
+        prefix = "> " * self._quote_depth
+        return "\n".join(prefix + line if line else prefix.rstrip() for line in text.split("\n"))
+
+    def _flush_table(self):
+        rows = [row for row in self._table if row]
+        self._table = None
+        if not rows:
+            return
+        width = max(len(row) for row in rows)
+        rows = [row + [""] * (width - len(row)) for row in rows]
+        lines = ["| " + " | ".join(rows[0]) + " |", "|" + " --- |" * width]
+        lines += ["| " + " | ".join(row) + " |" for row in rows[1:]]
+        self._blocks.append(self._quote("\n".join(lines)))
+
+
+def wechat_html_to_markdown(article_html: str) -> str:
+    """微信专用转换，在转换进程池中执行"""
+    return WechatMarkdownConverter().convert(article_html)
+
+
+class WechatMarkdownExporter(MarkdownExporter):
+    """使用 WechatMarkdownConverter 的 Markdown 导出器"""
+    convert = staticmethod(wechat_html_to_markdown)
@@ -0,0 +1,123 @@
+import re
+import time
+from typing import Optional
+
+import aiohttp
+from lxml import html as lxml_html
+
+from app.classify import classify_html, raise_for_page_kind
+from app.errors import ContentMissingError
+from app.export.document import ArticleDocument
+from app.utils.logger import logger
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9",
+}
+
+# 与浏览器路径 extract_document 一致，导出前移除的区域
+REMOVED_SELECTORS = ("content_bottom_area", "content_bottom_interaction")
+
+
+# 发布时间由页面脚本填充，服务端 HTML 中只有时间戳变量
+PUBLISH_TIME_PATTERN = re.compile(r'var\s+ct\s*=\s*"(\d+)"')
+
+
+class HttpArticleFetcher:
+    """不启动浏览器，直接用连接池抓取文章 HTML 并解析正文
+
+    微信文章正文是服务端渲染的，大多数情况下不需要执行 JS。
+    """
+
+    def __init__(self, concurrency: int = 16, timeout: float = 20):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def open(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, url: str) -> ArticleDocument:
+        """抓取并解析文章，正文缺失、文章已删除/被屏蔽或遇到验证页时抛出 ArticleError 子类"""
+        await self.open()
+        async with self._session.get(url) as response:
+            response.raise_for_status()
+            text = await response.text()
+            final_url = str(response.url)
+        raise_for_page_kind(classify_html(text, final_url), url)
+        article = parse_article_html(text, url)
+        logger.info(f"HTTP 抓取完成: {article.title} ({len(text) // 1024} KB)")
+        return article
+
+
+def parse_article_html(text: str, url: str) -> ArticleDocument:
+    """从文章页 HTML 中提取 ArticleDocument，字段与浏览器路径 extract_document 一致"""
+    tree = lxml_html.fromstring(text)
+    content = _first_by_id(tree, "page-content", "js_content")
+    body = _first_by_id(tree, "js_content")
+    if content is None or body is None or not body.text_content().strip():
+        raise ContentMissingError("未找到文章正文", url)
+
+    # 服务端输出的正文默认隐藏，等 JS 显示；这里直接去掉隐藏样式
+    style = body.get("style", "")
+    body.set("style", style.replace("visibility: hidden;", "").replace("opacity: 0;", ""))
+
+    for element_id in REMOVED_SELECTORS:
+        element = tree.get_element_by_id(element_id, None)
+        if element is not None:
+            element.drop_tree()
+    for script in list(content.iter("script")):
+        script.drop_tree()
+
+    # 懒加载图片: data-src -> src
+    for img in content.iter("img"):
+        real = img.get("data-src")
+        if real:
+            img.set("src", real)
+
+    title = _text_by_id(tree, "activity-name")
+    if not title:
+        meta = tree.find('.//meta[@property="og:title"]')
+        title = meta.get("content", "").strip() if meta is not None else ""
+
+    publish_time = _text_by_id(tree, "publish_time")
+    match = PUBLISH_TIME_PATTERN.search(text)
+    if not publish_time and match:
+        publish_time = time.strftime("%Y-%m-%d %H:%M", time.localtime(int(match.group(1))))
+
+    images = tuple(img.get("src") for img in content.iter("img")
+                   if img.get("src") and not img.get("src").startswith("data:"))
+    inner = (content.text or "") + "".join(
+        lxml_html.tostring(child, encoding="unicode") for child in content)
+    return ArticleDocument(
+        title=title,
+        author=_text_by_id(tree, "js_name"),
+        publish_time=publish_time,
+        content_html=inner,
+        images=images,
+        source_url=url,
+    )
+
+
+def _text_by_id(tree, element_id: str) -> str:
+    element = tree.get_element_by_id(element_id, None)
+    return element.text_content().strip() if element is not None else ""
+
+
+def _first_by_id(tree, *element_ids):
+    for element_id in element_ids:
+        element = tree.get_element_by_id(element_id, None)
+        if element is not None:
+            return element
+    return None
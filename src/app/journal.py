@@ -0,0 +1,175 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.utils.logger import logger
+
+
+DEFAULT_JOURNAL_PATH = Path.home() / ".weclip" / "jobs.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    formats TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    title TEXT,
+    status TEXT NOT NULL DEFAULT 'running',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (kind, source, formats, output_dir, status);
+CREATE TABLE IF NOT EXISTS articles (
+    job_id INTEGER NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    link TEXT NOT NULL,
+    title TEXT,
+    position INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, link)
+);
+"""
+
+# 任务状态：running 包括正在进行和进程意外退出的任务；failed 表示结束时仍有文章失败
+RUNNING, DONE, FAILED = "running", "done", "failed"
+# 文章状态
+PENDING = "pending"
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    source: str
+    formats: List[str]
+    output_dir: str
+    title: Optional[str] = None
+    status: str = RUNNING
+    # 本次启动前已经完成的文章链接
+    completed: Set[str] = field(default_factory=set)
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.completed)
+
+
+class JobJournal:
+    """记录合集/批量下载任务和每篇文章状态的 SQLite 日志(WAL 模式)
+
+    每篇文章完成时立即提交，程序崩溃、休眠或浏览器退出后，
+    以相同的来源、格式和输出目录重新开始任务只处理剩下的文章。
+    """
+
+    def __init__(self, path: Path = DEFAULT_JOURNAL_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 下载在浏览器服务线程中进行，界面线程也可能查询，连接由锁保护
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            # WAL + NORMAL：每次提交不等待 fsync，进程崩溃不丢已提交的记录
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("PRAGMA foreign_keys=ON")
+            self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def open_job(self, kind: str, source: str, formats: Iterable[str], output_dir: str,
+                 title: Optional[str] = None) -> Job:
+        """返回相同来源、格式和输出目录的未完成任务，没有时新建"""
+        formats = sorted({format_type.strip().lower() for format_type in formats if format_type.strip()})
+        key = (kind, source, json.dumps(formats), str(output_dir))
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, title FROM jobs WHERE kind = ? AND source = ? AND formats = ? AND output_dir = ?"
+                " AND status != ? ORDER BY id DESC LIMIT 1", (*key, DONE)).fetchone()
+            if row:
+                job_id, title = row[0], title or row[1]
+                self._connection.execute("UPDATE jobs SET status = ?, title = ?, updated_at = ? WHERE id = ?",
+                                         (RUNNING, title, now, job_id))
+                completed = {link for (link,) in self._connection.execute(
+                    "SELECT link FROM articles WHERE job_id = ? AND status = ?", (job_id, DONE))}
+            else:
+                job_id = self._connection.execute(
+                    "INSERT INTO jobs (kind, source, formats, output_dir, title, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)", (*key, title, now, now)).lastrowid
+                completed = set()
+        job = Job(job_id, kind, source, formats, str(output_dir), title, RUNNING, completed)
+        if job.resumed:
+            logger.info(f"继续未完成的任务 #{job_id}，已完成 {len(completed)} 篇，只下载剩下的文章")
+        return job
+
+    def add_article(self, job: Job, link: str, title: Optional[str], position: int):
+        """登记任务中的文章，已登记的保持原状态"""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO articles (job_id, link, title, position, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, link, title, position, time.time()))
+
+    def mark(self, job: Job, link: str, error: Optional[BaseException] = None):
+        """文章处理结束时的检查点"""
+        with self._lock:
+            self._connection.execute(
+                "UPDATE articles SET status = ?, error = ?, updated_at = ? WHERE job_id = ? AND link = ?",
+                (FAILED if error else DONE, str(error) if error else None, time.time(), job.id, link))
+
+    def finish_job(self, job: Job, complete: bool = True) -> str:
+        """结束任务：所有文章都完成且来源已完整处理时标记为 done，否则留待下次继续"""
+        with self._lock:
+            remaining = self._connection.execute(
+                "SELECT COUNT(*) FROM articles WHERE job_id = ? AND status != ?", (job.id, DONE)).fetchone()[0]
+            job.status = DONE if complete and not remaining else (FAILED if complete else RUNNING)
+            self._connection.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                                     (job.status, time.time(), job.id))
+        if not complete:
+            logger.info(f"任务 #{job.id} 的文章来源没有完整处理(如合集解析中断)，重新开始同一任务时会继续")
+        elif job.status != DONE:
+            logger.info(f"任务 #{job.id} 还有 {remaining} 篇未完成，重新开始同一任务时会继续下载")
+        return job.status
+
+    def get_job(self, job_id: int) -> Optional[Job]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, kind, source, formats, output_dir, title, status FROM jobs WHERE id = ?",
+                (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def unfinished_jobs(self) -> List[Dict]:
+        """未完成的任务及文章进度，最近的在前"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, kind, source, formats, output_dir, title, status,"
+                " (SELECT COUNT(*) FROM articles WHERE job_id = jobs.id),"
+                " (SELECT COUNT(*) FROM articles WHERE job_id = jobs.id AND status = 'done')"
+                " FROM jobs WHERE status != ? ORDER BY updated_at DESC", (DONE,)).fetchall()
+        jobs = []
+        for row in rows:
+            job = self._job(row[:7])
+            jobs.append({"id": job.id, "kind": job.kind, "source": job.source, "formats": job.formats,
+                         "output_dir": job.output_dir, "title": job.title, "status": job.status,
+                         "total": row[7], "done": row[8]})
+        return jobs
+
+    def articles(self, job: Job) -> List[Dict]:
+        """按登记顺序返回任务中的文章"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT link, title, status, error FROM articles WHERE job_id = ? ORDER BY position",
+                (job.id,)).fetchall()
+        return [{"link": link, "title": title or link, "status": status, "error": error}
+                for link, title, status, error in rows]
+
+    @staticmethod
+    def _job(row) -> Job:
+        job_id, kind, source, formats, output_dir, title, status = row
+        return Job(job_id, kind, source, json.loads(formats), output_dir, title, status)
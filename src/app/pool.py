@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext, Page
+
+from app.utils.logger import logger
+
+
+class PagePool:
+    """固定数量的页面池，所有页面共享同一个浏览器上下文(cookie/缓存)
+
+    lazy 为 True 时 open 不创建页面，借出时没有空闲页面才新建，最多 size 个；
+    此时 context 可以是返回浏览器上下文的异步函数，第一次创建页面时才调用，
+    http 引擎借此只在退回浏览器时才启动 Chromium。
+    """
+
+    def __init__(self, context: Union[BrowserContext, Callable[[], Awaitable[BrowserContext]]], size: int = 4,
+                 lazy: bool = False):
+        self.context: Optional[BrowserContext] = None if callable(context) else context
+        self._context_factory = context if callable(context) else None
+        self.size = max(1, size)
+        self.lazy = lazy
+        self.pages: List[Page] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # 已创建和正在创建的页面数
+        self._created = 0
+
+    async def open(self):
+        """创建页面并放入空闲队列，lazy 时只准备空闲队列"""
+        self._idle = asyncio.Queue()
+        self._lock = asyncio.Lock()
+        if self.lazy:
+            logger.info(f"页面池已就绪，按需创建页面，最多 {self.size} 个")
+            return
+        for _ in range(self.size):
+            self._idle.put_nowait(await self._new_page())
+        logger.info(f"页面池已就绪，共 {self.size} 个页面")
+
+    async def close(self):
+        """关闭池中所有页面"""
+        for page in self.pages:
+            try:
+                await page.close()
+            except Exception as e:
+                logger.info(f"关闭 Playwright 页面失败: {e}")
+        self.pages = []
+        self._idle = None
+        self._created = 0
+
+    async def _new_page(self) -> Page:
+        self._created += 1
+        try:
+            if self.context is None:
+                async with self._lock:
+                    if self.context is None:
+                        self.context = await self._context_factory()
+            page = await self.context.new_page()
+        except BaseException:
+            self._created -= 1
+            raise
+        self.pages.append(page)
+        return page
+
+    @asynccontextmanager
+    async def page(self):
+        """借出一个空闲页面，用完自动归还；页面已崩溃时换一个新页面"""
+        if self._idle.empty() and self._created < self.size:
+            page = await self._new_page()
+        else:
+            page = await self._idle.get()
+        try:
+            yield page
+        finally:
+            if page.is_closed():
+                self.pages.remove(page)
+                self._created -= 1
+                page = await self._new_page()
+            self._idle.put_nowait(page)
+
+
+# 单条任务完成时的回调: (已完成数, 总数, 任务项, 异常或 None)
+# 任务来自异步来源时，总数为目前已发现的数量，来源结束后才是最终总数
+DoneCallback = Callable[[int, int, Any, Optional[BaseException]], None]
+
+# 单条任务失败时决定是否重试: (任务项, 异常, 已尝试次数) -> 等待秒数，None 表示不再重试
+RetryCallback = Callable[[Any, BaseException, int], Optional[float]]
+
+# 所有任务结束后放入队列的结束标记
+_END = object()
+
+
+async def run_bounded(items: Union[Iterable[Any], AsyncIterable[Any]],
+                      worker: Callable[[Any], Awaitable[Any]],
+                      concurrency: int,
+                      on_done: Optional[DoneCallback] = None,
+                      max_pending: Optional[int] = None,
+                      retry: Optional[RetryCallback] = None) -> List[Tuple[Any, Optional[BaseException]]]:
+    """以固定并发度执行 worker，单个任务失败不会影响其它任务
+
+    items 也可以是异步可迭代对象(如边解析边产出的合集文章)：由一个生产者任务写入
+    最多 max_pending(默认并发数的两倍，0 表示不限)项的队列，队列满时生产者等待，形成背压。
+    失败的任务由 retry 决定等待多久后重新排队；等待期间不占用 worker，其它任务照常进行。
+    来源结束且没有等待重试的任务后，为每个 worker 放入一个结束标记。
+    返回按最终完成顺序排列的 (任务项, 异常或 None) 列表，on_done 只在任务最终完成时调用。
+    """
+    streaming = hasattr(items, "__aiter__")
+    if streaming:
+        worker_count = max(1, concurrency)
+        size = concurrency * 2 if max_pending is None else max_pending
+        # 队列至少能放下全部结束标记
+        queue: asyncio.Queue = asyncio.Queue(max(size, worker_count) if size else 0)
+        total = 0
+    else:
+        items = list(items)
+        total = len(items)
+        if not items:
+            return []
+        queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait((item, 1))
+        worker_count = max(1, min(concurrency, total))
+
+    results: List[Tuple[Any, Optional[BaseException]]] = []
+    # 已发现但还没有最终结果的任务数(包括等待重试的)
+    outstanding = total
+    source_done = not streaming
+    timers = set()
+
+    def _check_end():
+        if source_done and outstanding == 0:
+            for _ in range(worker_count):
+                queue.put_nowait(_END)
+
+    async def _produce():
+        nonlocal total, outstanding, source_done
+        try:
+            async for item in items:
+                total += 1
+                outstanding += 1
+                await queue.put((item, 1))
+        except Exception as e:
+            # 来源出错时已发现的任务照常完成
+            logger.error(f"任务来源异常结束，已发现 {total} 项: {e}")
+        source_done = True
+        _check_end()
+
+    async def _requeue(item, attempt: int, delay: float):
+        await asyncio.sleep(delay)
+        await queue.put((item, attempt))
+
+    async def _consume():
+        nonlocal outstanding
+        while True:
+            entry = await queue.get()
+            if entry is _END:
+                return
+            item, attempt = entry
+            error = None
+            try:
+                await worker(item)
+            except Exception as e:
+                error = e
+            delay = retry(item, error, attempt) if error is not None and retry else None
+            if delay is not None:
+                timer = asyncio.create_task(_requeue(item, attempt + 1, delay))
+                timers.add(timer)
+                timer.add_done_callback(timers.discard)
+                continue
+            outstanding -= 1
+            results.append((item, error))
+            if on_done:
+                on_done(len(results), total, item, error)
+            _check_end()
+
+    tasks = [asyncio.create_task(_consume()) for _ in range(worker_count)]
+    if streaming:
+        tasks.append(asyncio.create_task(_produce()))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in [*tasks, *timers]:
+            task.cancel()
+    return results
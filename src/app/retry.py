@@ -0,0 +1,126 @@
+import asyncio
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.errors import ArticleBlockedError, ArticleDeletedError, ContentMissingError, VerificationPageError
+from app.utils.logger import logger
+
+
+# 错误分类
+TIMEOUT = "timeout"
+VERIFICATION = "verification"
+MISSING = "missing"
+IO = "io"
+# 文章已删除或被屏蔽，重试没有意义
+GONE = "gone"
+OTHER = "other"
+
+ERROR_CLASS_NAMES = {
+    TIMEOUT: "超时",
+    VERIFICATION: "验证页",
+    MISSING: "正文缺失或文章不存在",
+    IO: "网络/读写错误",
+    GONE: "已删除或被屏蔽",
+    OTHER: "其他错误",
+}
+
+# 下载结束后写入输出目录的永久失败列表，可以直接作为批量下载的链接文件
+FAILED_FILENAME = "failed.txt"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """重试策略：最多尝试 max_attempts 次(含第一次)，等待时间指数增长并加入随机抖动"""
+    max_attempts: int = 3
+    base_delay: float = 2.0
+    max_delay: float = 120.0
+    multiplier: float = 2.0
+    # 等待时间在 [1 - jitter, 1 + jitter] 倍之间随机，避免失败的文章同时重试
+    jitter: float = 0.5
+
+    def delay(self, attempt: int) -> Optional[float]:
+        """第 attempt 次尝试失败后的等待秒数，已达到次数上限时返回 None"""
+        if attempt >= self.max_attempts:
+            return None
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+DEFAULT_RETRY_POLICIES: Dict[str, RetryPolicy] = {
+    # 网络慢或页面卡住，稍后重试通常能成功
+    TIMEOUT: RetryPolicy(max_attempts=3, base_delay=5.0),
+    # 触发了反爬，需要等更久让频率降下来
+    VERIFICATION: RetryPolicy(max_attempts=3, base_delay=60.0, max_delay=600.0),
+    # 可能是渲染不完整，也可能文章已被删除，只再试一次
+    MISSING: RetryPolicy(max_attempts=2, base_delay=10.0),
+    IO: RetryPolicy(max_attempts=4, base_delay=2.0),
+    GONE: RetryPolicy(max_attempts=1),
+    # 解析或导出的程序错误，重试也不会成功
+    OTHER: RetryPolicy(max_attempts=1),
+}
+
+
+def classify_error(error: BaseException) -> str:
+    """按异常类型判断错误分类，不导入 Playwright/aiohttp，按类名识别它们的异常"""
+    if isinstance(error, VerificationPageError):
+        return VERIFICATION
+    if isinstance(error, (ArticleDeletedError, ArticleBlockedError)):
+        return GONE
+    if isinstance(error, ContentMissingError):
+        return MISSING
+    # HTTP 4xx(429 限流除外)说明文章不存在或无权访问
+    status = getattr(error, "status", None)
+    if isinstance(status, int) and 400 <= status < 500 and status != 429:
+        return MISSING
+    names = {cls.__name__ for cls in type(error).__mro__}
+    # asyncio/内置超时、Playwright 的 TimeoutError、aiohttp 的 ServerTimeoutError
+    if isinstance(error, asyncio.TimeoutError) or "TimeoutError" in names:
+        return TIMEOUT
+    # Playwright 的网络错误只能从消息区分，如 net::ERR_CONNECTION_RESET
+    if isinstance(error, OSError) or "ClientError" in names or "net::ERR_" in str(error):
+        return IO
+    return OTHER
+
+
+class RetryTracker:
+    """给 run_bounded 的重试回调：按错误分类选择策略，并统计重试和永久失败"""
+
+    def __init__(self, policies: Optional[Dict[str, RetryPolicy]] = None):
+        self.policies = {**DEFAULT_RETRY_POLICIES, **(policies or {})}
+        self.retried: Dict[str, int] = {}
+
+    def __call__(self, item, error: BaseException, attempt: int) -> Optional[float]:
+        error_class = classify_error(error)
+        delay = self.policies[error_class].delay(attempt)
+        if delay is None:
+            return None
+        self.retried[error_class] = self.retried.get(error_class, 0) + 1
+        name = item.get("title") if isinstance(item, dict) else item
+        logger.info(f"第 {attempt} 次下载失败({ERROR_CLASS_NAMES[error_class]}: {error})，"
+                    f"{delay:.1f}s 后重试: {name}")
+        return delay
+
+    def summary(self) -> str:
+        return "，".join(f"{ERROR_CLASS_NAMES[error_class]} {count} 次"
+                        for error_class, count in self.retried.items()) or "无"
+
+
+def write_failure_report(output_dir: Path, failures: List[Tuple[Dict, BaseException]]) -> Optional[Path]:
+    """把永久失败的文章写入 failed.txt：每篇一行链接，上面一行是 # 开头的标题和原因
+
+    没有失败时删除上次留下的文件。
+    """
+    path = Path(output_dir) / FAILED_FILENAME
+    if not failures:
+        path.unlink(missing_ok=True)
+        return None
+    lines = ["# 下载失败的文章，可以作为批量下载的链接文件重新下载"]
+    for article, error in failures:
+        title = article.get("title") or article["link"]
+        lines.append(f"# {title} [{ERROR_CLASS_NAMES[classify_error(error)]}] {error}".replace("\n", " "))
+        lines.append(article["link"])
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    logger.info(f"{len(failures)} 篇文章下载失败，失败列表已写入 {path}")
+    return path
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, FrozenSet
+from urllib.parse import urlsplit
+from weakref import WeakKeyDictionary
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page, Route
+
+from app.utils.logger import logger
+
+
+# 微信文章正常渲染所需的域名，其余域名视为第三方
+FIRST_PARTY_HOSTS = ("qq.com", "qpic.cn", "qlogo.cn")
+
+# 统计、上报类请求，任何导出格式都用不到
+TRACKING_PATTERNS = ("/mp/jsmonitor", "/mp/appmsgreport", "/mp/webcommreport", "beacon", "report.url.cn")
+
+
+@dataclass(frozen=True)
+class ResourcePolicy:
+    """页面加载时的资源拦截策略"""
+    blocked_types: FrozenSet[str] = frozenset()
+    block_third_party: bool = False
+    block_tracking: bool = False
+
+    def allows(self, resource_type: str, url: str) -> bool:
+        """判断请求是否放行，主文档请求永远放行"""
+        if resource_type == "document":
+            return True
+        if resource_type in self.blocked_types:
+            return False
+        if self.block_tracking and any(pattern in url for pattern in TRACKING_PATTERNS):
+            return False
+        if self.block_third_party:
+            host = urlsplit(url).hostname or ""
+            if host and not any(host == h or host.endswith("." + h) for h in FIRST_PARTY_HOSTS):
+                return False
+        return True
+
+    def merge(self, other: "ResourcePolicy") -> "ResourcePolicy":
+        """合并两个策略，结果只拦截两者都会拦截的请求"""
+        return ResourcePolicy(
+            blocked_types=self.blocked_types & other.blocked_types,
+            block_third_party=self.block_third_party and other.block_third_party,
+            block_tracking=self.block_tracking and other.block_tracking,
+        )
+
+
+# 不拦截任何请求
+ALLOW_ALL = ResourcePolicy()
+
+# 只需要 DOM 文本(如 Markdown)：图片、音视频、字体、第三方脚本全部拦截
+TEXT_ONLY = ResourcePolicy(
+    blocked_types=frozenset({"image", "media", "font", "stylesheet"}),
+    block_third_party=True,
+    block_tracking=True,
+)
+
+# 需要图片参与渲染(如 HTML/PDF)：只拦截音视频、字体和第三方请求
+WITH_IMAGES = ResourcePolicy(
+    blocked_types=frozenset({"media", "font"}),
+    block_third_party=True,
+    block_tracking=True,
+)
+
+
+# 每个页面当前生效的策略和被拦截的请求数
+_installed: "WeakKeyDictionary[Page, ResourcePolicy]" = WeakKeyDictionary()
+_blocked_counts: "WeakKeyDictionary[Page, int]" = WeakKeyDictionary()
+
+
+async def apply_resource_policy(page: Page, policy: ResourcePolicy):
+    """为页面安装请求拦截策略，策略未变化时不重复安装"""
+    current = _installed.get(page)
+    if current == policy:
+        return
+    if current is not None:
+        await page.unroute("**/*")
+    _installed[page] = policy
+    if policy == ALLOW_ALL:
+        return
+
+    async def _handle(route: Route):
+        request = route.request
+        if policy.allows(request.resource_type, request.url):
+            await route.continue_()
+        else:
+            _blocked_counts[page] = _blocked_counts.get(page, 0) + 1
+            await route.abort()
+
+    await page.route("**/*", _handle)
+    logger.info(f"已安装资源拦截策略: {sorted(policy.blocked_types)}，拦截第三方: {policy.block_third_party}")
+
+
+def pop_blocked_count(page: Page) -> int:
+    """返回并清零页面自上次调用以来被拦截的请求数"""
+    return _blocked_counts.pop(page, 0)
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Optional
+
+from app.browser import BrowserManager
+from app.export.executor import shutdown_conversion_pool
+from app.utils.logger import logger
+
+
+class BrowserService:
+    """常驻浏览器服务：一个后台线程 + 一个事件循环 + 一个浏览器实例
+
+    所有 UI 任务都把协程提交到这里执行，解析合集和下载文章共用同一个浏览器，
+    避免重复冷启动，也不会丢失两次操作之间的 cookie 和缓存。
+    """
+
+    def __init__(self, manager: Optional[BrowserManager] = None):
+        self.manager = manager or BrowserManager()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._open_lock = asyncio.Lock()
+        # UI 的延迟预热和下载任务的 submit 可能在不同线程同时调用 start
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """启动后台线程并预热浏览器"""
+        with self._start_lock:
+            if self._thread:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, name="browser-service", daemon=True)
+            self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.ensure_browser(), self._loop)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def ensure_browser(self) -> bool:
+        """浏览器未启动或已断开时(重新)启动"""
+        async with self._open_lock:
+            # http 引擎的浏览器按需启动，页面池就绪即可
+            if self.manager.is_connected():
+                return True
+            if self.manager.pool is not None:
+                logger.info("浏览器连接已断开，正在重新启动...")
+                await self.manager.close_browser()
+            is_success = await self.manager.open_browser()
+            if is_success:
+                logger.info("浏览器服务已就绪...")
+            else:
+                logger.info("浏览器服务启动失败...")
+            return is_success
+
+    async def _guarded(self, coro: Awaitable):
+        if not await self.ensure_browser():
+            coro.close()
+            raise RuntimeError("浏览器未能启动")
+        return await coro
+
+    def submit(self, coro: Awaitable) -> Future:
+        """提交协程到服务线程执行，返回 concurrent.futures.Future"""
+        if not self._thread:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(self._guarded(coro), self._loop)
+
+    def stop(self, timeout: float = 10):
+        """关闭浏览器并停止后台线程"""
+        if not self._thread:
+            return
+        future = asyncio.run_coroutine_threadsafe(self.manager.close_browser(), self._loop)
+        try:
+            future.result(timeout)
+        except Exception as e:
+            logger.info(f"关闭浏览器服务失败: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        shutdown_conversion_pool()
+        self._thread = None
+        self._loop = None
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager, nullcontext
+from typing import Dict, Optional
+
+from app.retry import TIMEOUT, VERIFICATION, classify_error
+from app.utils.logger import logger
+
+
+class AdaptiveController:
+    """按加性增、乘性减(AIMD)调整抓取文章的并发数和请求速率
+
+    每个请求先等待并发名额，再从令牌桶取一个令牌(速率 rate 次/秒)。
+    连续成功 concurrency 次(约一轮)后并发数 +1、速率 +rate_step；
+    遇到验证页、超时或响应慢于 slow_threshold 时两者都乘以 decrease_factor。
+    一次拥塞往往让同一时刻在途的多个请求同时失败，cooldown 秒内只减一次。
+    """
+
+    def __init__(self, initial_concurrency: int = 2, min_concurrency: int = 1, max_concurrency: int = 16,
+                 initial_rate: float = 2.0, min_rate: float = 0.2, max_rate: float = 10.0, rate_step: float = 0.5,
+                 decrease_factor: float = 0.5, slow_threshold: float = 15.0, cooldown: float = 10.0):
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.concurrency = min(max(initial_concurrency, self.min_concurrency), self.max_concurrency)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(initial_rate, min_rate), max_rate)
+        self.rate_step = rate_step
+        self.decrease_factor = decrease_factor
+        self.slow_threshold = slow_threshold
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self._streak = 0
+        self._last_decrease = float("-inf")
+        self._slots: Optional[asyncio.Condition] = None
+        self._bucket_lock: Optional[asyncio.Lock] = None
+        self._tokens = 1.0
+        self._refilled_at = time.monotonic()
+        self.stats = {"succeeded": 0, "failed": 0, "throttled": 0, "slow": 0, "decreases": 0}
+
+    def metrics(self) -> Dict:
+        """当前速率、并发上限和在途请求数，供进度显示"""
+        return {"rate": round(self.rate, 2), "concurrency": self.concurrency, "in_flight": self.in_flight,
+                **self.stats}
+
+    @asynccontextmanager
+    async def request(self):
+        """包住一次页面加载或 HTTP 请求，按结果调整速率；异常照常抛出"""
+        await self._acquire()
+        started = time.monotonic()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._record(time.monotonic() - started, error)
+            await self._free_slot()
+
+    async def _acquire(self):
+        # 锁在第一次使用时创建，绑定到浏览器服务的事件循环
+        if self._slots is None:
+            self._slots = asyncio.Condition()
+            self._bucket_lock = asyncio.Lock()
+        async with self._slots:
+            await self._slots.wait_for(lambda: self.in_flight < self.concurrency)
+            self.in_flight += 1
+        try:
+            await self._take_token()
+        except BaseException:
+            await self._free_slot()
+            raise
+
+    async def _take_token(self):
+        """令牌桶，容量 1：请求之间至少间隔 1/rate 秒"""
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(1.0, self._tokens + (now - self._refilled_at) * self.rate)
+                self._refilled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def _free_slot(self):
+        async with self._slots:
+            self.in_flight -= 1
+            self._slots.notify_all()
+
+    def _record(self, elapsed: float, error: Optional[BaseException]):
+        error_class = classify_error(error) if error is not None else None
+        if error_class in (VERIFICATION, TIMEOUT):
+            self.stats["failed"] += 1
+            self.stats["throttled"] += error_class == VERIFICATION
+            self._decrease(f"{'遇到验证页' if error_class == VERIFICATION else '请求超时'}")
+        elif error is not None:
+            # 正文缺失、404 等与请求频率无关，不调整
+            self.stats["failed"] += 1
+        elif elapsed > self.slow_threshold:
+            self.stats["succeeded"] += 1
+            self.stats["slow"] += 1
+            self._decrease(f"响应慢({elapsed:.1f}s)")
+        else:
+            self.stats["succeeded"] += 1
+            self._increase()
+
+    def _increase(self):
+        self._streak += 1
+        if self._streak < self.concurrency:
+            return
+        self._streak = 0
+        if self.concurrency < self.max_concurrency or self.rate < self.max_rate:
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+            self.rate = min(self.max_rate, self.rate + self.rate_step)
+            logger.info(f"抓取顺利，并发数提高到 {self.concurrency}，速率 {self.rate:.1f} 次/秒")
+
+    def _decrease(self, reason: str):
+        self._streak = 0
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.stats["decreases"] += 1
+        self.concurrency = max(self.min_concurrency, int(self.concurrency * self.decrease_factor))
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        logger.info(f"{reason}，并发数降到 {self.concurrency}，速率 {self.rate:.2f} 次/秒")
+
+
+def throttled(controller: Optional[AdaptiveController]):
+    """controller 为 None(未启用自适应限速)时不做任何限制"""
+    return controller.request() if controller is not None else nullcontext()
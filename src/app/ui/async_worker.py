@@ -1,8 +1,6 @@
 from PyQt5.QtCore import QThread, pyqtSignal
-import asyncio
 from app.utils.logger import logger
-from app.browser import BrowserManager
-from pathlib import Path
+from app.service import BrowserService
 
 
 
@@ -15,23 +13,26 @@ class DownloadTask(QThread):
     finished = pyqtSignal()
     progress = pyqtSignal(int)
 
-    def __init__(self, config, browser_manager: BrowserManager, should_report_progress: bool = False):
+    def __init__(self, config, service: BrowserService, should_report_progress: bool = False):
         super().__init__()
         self.config = config
-        self.browser_manager = browser_manager
+        self.service = service
+        self.browser_manager = service.manager
         self.should_report_progress = should_report_progress
 
     def run(self):
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(self.start_download())
+            # 在常驻浏览器服务的事件循环中执行，本线程只负责等待结果
+            self.service.submit(self.start_download()).result()
             self.finished.emit()
         except Exception as e:
             logger.error(f"Download task failed: {e}")
             self.finished.emit()
-        finally:
-            loop.close()
+
+    def _report_progress(self, done: int, total: int):
+        progress = int(done / total * 10000)
+        logger.info(f"更新进度条: {progress/100:.2f}%")  # 记录实际百分比
+        self.progress.emit(progress)  # 传递0-10000之间的值
 
     async def start_download(self):
         """
@@ -43,19 +44,10 @@ class DownloadTask(QThread):
         output_dir = self.config["output_dir"]
         logger.info(f"配置: \n {self.config}")
 
-        # Open the browser within the thread
-        is_success = await self.browser_manager.open_browser()
-        if is_success:
-            logger.info("浏览器打开成功...")
-        else:
-            logger.info("打开失败...")
-            return
-
-
         progress_callback = None
         if self.should_report_progress:
             logger.info("设置进度条回调")
-            progress_callback = self.progress.emit
+            progress_callback = self._report_progress
 
 
         try:
@@ -64,45 +56,21 @@ class DownloadTask(QThread):
                 await self.browser_manager.download_one(url=url, output_dir=output_dir, format_type=format_type)
 
             elif mode == '合集':
-                article_info = await self.browser_manager.parse_album(url=url)
-
-                total = article_info['total']
-                articles = article_info['articles']
-                album_name = article_info['album_name']
-
-                output_dir = Path(output_dir) / Path(album_name)
-
-                for i, article in enumerate(articles):
-                    await self.browser_manager.download_one(url=article['link'], output_dir=output_dir, format_type=format_type)
-                    if progress_callback:
-                        progress = int((i + 1) / total * 10000)
-                        logger.info(f"更新进度条: {progress}")
-                        progress_callback(progress)
-
-                # await self.browser_manager.download_album(url=url, output_dir=output_dir, format_type=format_type, progress_callback=progress_callback)
+                # 边解析边下载，文章保存到以合集名称命名的子目录；总数在解析结束前会随进度增长
+                await self.browser_manager.download_album(url=url, output_dir=output_dir, format_type=format_type,
+                                                          progress_callback=progress_callback)
 
             elif mode == '批量':
 
-                urls = [u.strip() for u in url.split('\n') if u.strip()]
-                total = len(urls)
-                for i, single_url in enumerate(urls):
-                    # 这里假设批量下载不需要再解析，lineEdit中的每一行就是一个可以直接下载的URL
-                    await self.browser_manager.download_one(url=single_url, output_dir=output_dir, format_type=format_type)
-                    if progress_callback:
-                        progress = int((i + 1) / total * 10000)
-                        logger.info(f"更新进度条: {progress/100:.2f}%")  # 记录实际百分比
-                        progress_callback(progress)  # 传递0-10000之间的值
+                # 这里假设批量下载不需要再解析，lineEdit中的每一行就是一个可以直接下载的URL；# 开头的行(如 failed.txt 中的说明)跳过
+                urls = [u.strip() for u in url.split('\n') if u.strip() and not u.lstrip().startswith('#')]
+                await self.browser_manager.download_articles(articles=urls, output_dir=output_dir,
+                                                             format_type=format_type,
+                                                             progress_callback=progress_callback)
 
 
         except Exception as e:
             logger.error(f"Download failed: {e}")
-        finally:
-            is_success = await self.browser_manager.close_browser()
-
-            if is_success:
-                logger.info("浏览器关闭成功...")
-            else:
-                logger.info("关闭失败...")
 
 
 class ParseAlbumTask(QThread):
@@ -110,19 +78,18 @@ class ParseAlbumTask(QThread):
     finished = pyqtSignal()
     error = pyqtSignal(str)
 
-    def __init__(self, config, browser_manager: BrowserManager):
+    def __init__(self, config, service: BrowserService):
         super().__init__()
         self.config = config
-        self.browser_manager = browser_manager
+        self.service = service
+        self.browser_manager = service.manager
 
     def run(self):
         """
         Override the run method to execute the download task.
         """
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            article_info = loop.run_until_complete(self.parse_and_get_articles())
+            article_info = self.service.submit(self.parse_and_get_articles()).result()
             if article_info:
                 self.articles_parsed.emit(article_info['articles'], self.config)  # 发射信号
             else:
@@ -132,17 +99,10 @@ class ParseAlbumTask(QThread):
             self.error.emit(str(e))
             logger.error(f"Parse album task failed: {e}")
             self.finished.emit()
-        finally:
-            loop.close()
 
     async def parse_and_get_articles(self):
         """解析合集文章列表"""
         try:
-            is_success = await self.browser_manager.open_browser()
-            if not is_success:
-                logger.error("Failed to open browser for parsing album.")
-                return None
-
             article_info = await self.browser_manager.parse_album(url=self.config['url'])
 
             if article_info is None:
@@ -154,10 +114,6 @@ class ParseAlbumTask(QThread):
         except Exception as e:
             logger.error(f"解析合集失败: {e}")
             return None
-        finally:
-            is_success = await self.browser_manager.close_browser()
-            if not is_success:
-                logger.error("Failed to close browser after parsing album.")
 
 
 
@@ -169,17 +125,25 @@ class ArticleDownloadTask(QThread):
     finished = pyqtSignal()
     progress = pyqtSignal(int)
 
-    def __init__(self, config, browser_manager: BrowserManager):
+    def __init__(self, config, service: BrowserService):
         super().__init__()
         self.config = config
-        self.browser_manager = browser_manager
+        self.service = service
+        self.browser_manager = service.manager
+
+    def _report_progress(self, done: int, total: int):
+        # 更新进度条
+        logger.info(f"----------------已下载{done} / {total}篇文章----------------")
+        progress = int(done / total * 10000)
+        logger.info(f"更新进度条: {progress}")
+        self.progress.emit(progress)
 
     def run(self):
         """
         Override the run method to execute the download task.
         """
         try:
-            asyncio.run(self.start_download())
+            self.service.submit(self.start_download()).result()
             self.finished.emit()
         except Exception as e:
             logger.error(f"Download task failed: {e}")
@@ -192,42 +156,18 @@ class ArticleDownloadTask(QThread):
         articles = self.config['articles']
         format_type = self.config["format_type"]
         output_dir = self.config["output_dir"]
-        total = self.config["total"]
 
         logger.info(f"配置: \n {self.config}")
 
-        
-
-        # Open the browser within the thread
-        is_success = await self.browser_manager.open_browser()
-        if is_success:
-            logger.info("浏览器打开成功...")
-        else:
-            logger.info("打开失败...")
-            return
-        
         if not articles:
             return
         
         logger.info(f"----------------开始下载: {len(articles)}篇文章----------------")  # Use the imported logger
         try:
-            for i, article in enumerate(articles):
-                url = article['link'] if isinstance(article, dict) else article
-                await self.browser_manager.download_one(url=url, output_dir=output_dir, format_type=format_type)
-
-                # 更新进度条
-                logger.info(f"----------------已下载{i+1} / {len(articles)}篇文章----------------")
-                progress = int((i + 1) / total * 10000)
-                logger.info(f"更新进度条: {progress}")
-                self.progress.emit(progress)
+            await self.browser_manager.download_articles(articles=articles, output_dir=output_dir,
+                                                         format_type=format_type,
+                                                         progress_callback=self._report_progress)
 
         except Exception as e:
             logger.error(f"Download failed: {e}")
-        finally:
-            is_success = await self.browser_manager.close_browser()
-
-            if is_success:
-                logger.info("浏览器关闭成功...")
-            else:
-                logger.info("关闭失败...")
 
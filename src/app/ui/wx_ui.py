@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtWidgets import QFileDialog, QListWidgetItem, QApplication, QDialog, QVBoxLayout, QListView, QAbstractItemView, QDialogButtonBox
 from PyQt5.QtCore import Qt, QStringListModel, QThread, pyqtSignal, QObject
@@ -9,10 +9,13 @@ import sys
 import asyncio
 
 from app.utils.logger import logger
-from app.browser import BrowserManager
+from app.service import BrowserService
 from .async_worker import ParseAlbumTask,DownloadTask,ArticleDownloadTask
 from .selection_dialog import ArticleSelectionDialog
 
+# 窗口显示后延迟启动浏览器服务的时间
+SERVICE_WARMUP_DELAY_MS = 200
+
 # 定义一个信号类，用于传递日志消息
 class LogSignal(QtCore.QObject):
     log_message = QtCore.pyqtSignal(str)
@@ -40,7 +43,8 @@ class Ui_Window(QObject):
         super().__init__()
 
         # 初始化成员变量
-        self.manager = BrowserManager()
+        self.service = BrowserService()
+        self.manager = self.service.manager
         self.download_task = None
         self.selected_path = ""
         self.default_dir = Path.home().joinpath("Desktop", "微信公众号文章")
@@ -82,7 +86,7 @@ class Ui_Window(QObject):
         self.horizontalLayout_3 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_3.setObjectName("horizontalLayout_3")
 
-        # 创建一个子水平布局来包含 label 和 selectMode
+        # 创建一个子水平布局来包含 label 和导出格式选项
         left_group_layout = QtWidgets.QHBoxLayout()
 
         self.label = QtWidgets.QLabel(Window)
@@ -92,12 +96,16 @@ class Ui_Window(QObject):
         self.label.setObjectName("label")
         left_group_layout.addWidget(self.label)
 
-        self.selectMode = QtWidgets.QComboBox(Window)
-        self.selectMode.setObjectName("selectMode")
-        self.selectMode.addItems(["markdown", "pdf", "html"])
-        left_group_layout.addWidget(self.selectMode)
+        # 导出格式可多选，一次下载同时导出所有选中的格式
+        self.formatChecks = {}
+        for format_type in ["markdown", "pdf", "html", "epub"]:
+            check = QtWidgets.QCheckBox(format_type, Window)
+            check.setObjectName(f"formatCheck_{format_type}")
+            left_group_layout.addWidget(check)
+            self.formatChecks[format_type] = check
+        self.formatChecks["markdown"].setChecked(True)
 
-        # 将包含 label 和 selectMode 的子布局添加到主布局
+        # 将包含 label 和导出格式选项 的子布局添加到主布局
         self.horizontalLayout_3.addLayout(left_group_layout)
 
         # 中间的弹簧
@@ -128,7 +136,7 @@ class Ui_Window(QObject):
         self.horizontalLayout_3.addWidget(self.importButton)
 
         # 设置弹簧的伸缩因子，让它们均匀分布
-        self.horizontalLayout_3.setStretch(0, 0)  # left_group_layout (包含 label 和 selectMode)
+        self.horizontalLayout_3.setStretch(0, 0)  # left_group_layout (包含 label 和导出格式选项)
         self.horizontalLayout_3.setStretch(1, 1)  # spacerItemMiddle1
         self.horizontalLayout_3.setStretch(2, 0)  # clearLogButton
         self.horizontalLayout_3.setStretch(3, 1)  # spacerItemMiddle2
@@ -204,6 +212,10 @@ class Ui_Window(QObject):
 
         self.setup_logging()
 
+        # 窗口绘制出来之后再在后台预热浏览器服务(导入 Playwright 并启动浏览器)，后续所有任务共用；
+        # 在此之前提交的任务会自行启动服务
+        QtCore.QTimer.singleShot(SERVICE_WARMUP_DELAY_MS, self.service.start)
+
     @QtCore.pyqtSlot(str)
     def update_log_view(self, msg):
         """Updates the QListWidget with the log message (runs in the main thread)."""
@@ -252,7 +264,7 @@ class Ui_Window(QObject):
 
         # 新增代码
         if config['mode'] == '合集':
-            self.parse_album_task = ParseAlbumTask(config, self.manager)
+            self.parse_album_task = ParseAlbumTask(config, self.service)
             self.parse_album_task.articles_parsed.connect(self.show_selection_dialog_signal.emit)  # 连接信号
             self.parse_album_task.finished.connect(lambda: logger.info("合集解析任务完成"))
             self.parse_album_task.error.connect(self.on_parse_album_error)
@@ -267,7 +279,7 @@ class Ui_Window(QObject):
     def start_article_download(self, config):
         """启动单篇文章下载任务"""
         should_report_progress = config['mode'] in ['合集', '批量']
-        self.download_task = DownloadTask(config, self.manager, should_report_progress)
+        self.download_task = DownloadTask(config, self.service, should_report_progress)
         self.download_task.finished.connect(self.on_download_finished)
         self.download_task.progress.connect(self.update_progress)  # 连接进度信号
 
@@ -302,7 +314,7 @@ class Ui_Window(QObject):
     def start_download_task(self, config):
         """启动下载任务"""
         if config and config.get('articles'):
-            self.download_task = ArticleDownloadTask(config, self.manager)
+            self.download_task = ArticleDownloadTask(config, self.service)
             self.download_task.finished.connect(self.on_download_finished)
             self.download_task.progress.connect(self.update_progress)
             self.download_task.start()
@@ -366,6 +378,10 @@ class Ui_Window(QObject):
                 # 可以添加更详细的错误处理
                 print(f"读取文件时发生错误: {e}")
 
+    def shutdown(self):
+        """程序退出时关闭浏览器服务"""
+        self.service.stop()
+
     def clear_log(self):
         self.logView.clear()
 
@@ -373,12 +389,20 @@ class Ui_Window(QObject):
         config = {
             "url": self.lineEdit.text(),
             "mode": self.selectType.currentText(),
-            "format_type": self.selectMode.currentText(),
+            "format_type": self.selected_formats(),
             "output_dir": self.pathLine.text()
         }
 
         return config
 
+    def selected_formats(self) -> List[str]:
+        """返回勾选的导出格式，都未勾选时默认 markdown"""
+        formats = [name for name, check in self.formatChecks.items() if check.isChecked()]
+        if not formats:
+            logger.warning("未选择导出格式，默认导出 markdown")
+            formats = ["markdown"]
+        return formats
+
     def handle_start(self):
         config = self.get_config()
         logger.info("开始任务...")
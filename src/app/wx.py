@@ -1,18 +1,160 @@
+from __future__ import annotations
+
 import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
-from playwright.async_api import Page
-import html2text
-import os
+from typing import (TYPE_CHECKING, AsyncContextManager, AsyncIterable, AsyncIterator, Callable, Dict, Iterable,
+                    List, Optional, Union)
 import re
+import time
+from app.cache import DocumentCache, OutputManifest
+from app.classify import NORMAL, PAGE_KIND_NAMES, classify_page, count_page_kinds, format_page_stats, \
+    raise_for_page_kind
+from app.errors import ArticleBlockedError, ArticleDeletedError, ArticleError
+from app.export.document import MINIMAL_PRUNE, ArticleDocument, PruneOptions, extract_document
+from app.export.base import ArticleExporter
+from app.export.executor import get_conversion_pool
 from app.export.factory import ExporterFactory
+from app.export.images import RecompressOptions
+from app.journal import Job, JobJournal
+from app.pool import PagePool, run_bounded
+from app.retry import RetryPolicy, RetryTracker, write_failure_report
+from app.routing import ALLOW_ALL, apply_resource_policy, pop_blocked_count
+from app.throttle import AdaptiveController, throttled
 from app.utils.logger import logger
 
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+# 导出格式：单个格式、逗号分隔的字符串或格式列表
+FormatTypes = Optional[Union[str, Iterable[str]]]
+
+# 任务下载过程中保存下载清单的最短间隔(秒)
+MANIFEST_SAVE_INTERVAL = 5.0
+
+EXPAND_MORE_SELECTOR = 'div.unfold-more__word:has-text("展开更多")'
+
+# 条目数量超过 count 返回 "grew"；到底标记可见或展开按钮消失返回 "end"；否则继续等待
+ALBUM_GROWTH_JS = """([selector, count]) => {
+    if (document.querySelectorAll(selector).length > count) return "grew";
+    const visible = element => element && getComputedStyle(element).display !== "none" && element.offsetParent !== null;
+    if (visible(document.querySelector(".over-line.js_no_more_album"))) return "end";
+    const buttons = Array.from(document.querySelectorAll("div.unfold-more__word"));
+    if (buttons.length && !buttons.some(button => button.textContent.includes("展开更多") && visible(button))) return "end";
+    return false;
+}"""
+
+
+@asynccontextmanager
+async def _borrowed(page: Page):
+    """把调用方已持有的页面包装成与 PagePool.page() 相同的用法"""
+    yield page
+
+
 class WechatArticleDownloader:
-    def __init__(self,default_format: str = "md"):
+    def __init__(self,default_format: str = "md", concurrency: int = 4, block_resources: bool = True,
+                 engine: str = "browser", http_concurrency: int = 16, album_mode: str = "api",
+                 album_api_base: str = "https://mp.weixin.qq.com", album_step_timeout: float = 10.0,
+                 album_settle_timeout: float = 2.0, album_idle_steps: int = 2, album_max_steps: int = 1000,
+                 localize_images: bool = True, image_concurrency: int = 8,
+                 recompress_images: Optional[RecompressOptions] = None, use_cache: bool = True,
+                 cache: Optional[DocumentCache] = None, refresh_cache: bool = False, use_journal: bool = True,
+                 journal: Optional[JobJournal] = None, retry_failed: bool = True,
+                 retry_policies: Optional[Dict[str, RetryPolicy]] = None, adaptive_throttle: bool = True,
+                 throttle: Optional[AdaptiveController] = None):
         # 默认保存格式
         self.default_format = default_format
+        # 同时下载的文章数，实际并发还受页面池大小限制
+        self.concurrency = concurrency
+        # 是否按导出器的资源策略拦截不需要的请求
+        self.block_resources = block_resources
+        # 抓取引擎: "browser" 只用 Playwright；"http" 先直接请求 HTML，失败再退回浏览器
+        self.engine = engine
+        self.http_concurrency = http_concurrency
+        self._fetcher = None
+        # 合集解析方式: "api" 直接分页请求列表接口，失败时退回 "dom" 滚动页面
+        self.album_mode = album_mode
+        self.album_api_base = album_api_base
+        # 页面滚动解析的等待参数：单步最长等待、接口响应后等待渲染的时间、连续无增长的步数上限、总步数上限
+        self.album_step_timeout = album_step_timeout
+        self.album_settle_timeout = album_settle_timeout
+        self.album_idle_steps = album_idle_steps
+        self.album_max_steps = album_max_steps
+        # 是否把图片下载到输出目录的 assets 下并改写为本地路径
+        self.localize_images = localize_images
+        self.image_concurrency = image_concurrency
+        # 可选的图片缩放转码，None 表示保留原图
+        self.recompress_images = recompress_images
+        # 文章缓存：先查缓存再抓取；refresh_cache 时不读缓存，只写入新结果
+        self.use_cache = use_cache
+        self.cache = cache
+        self.refresh_cache = refresh_cache
+        # 合集和批量下载的任务日志，中断后重新开始同一任务只下载剩下的文章
+        self.use_journal = use_journal
+        self.journal = journal
+        # 失败的文章按错误分类延后重试，retry_policies 覆盖 app.retry 中的默认策略
+        self.retry_failed = retry_failed
+        self.retry_policies = retry_policies
+        # 页面加载和 HTTP 请求前的自适应限速，顺利时逐步加快，遇到验证页或超时立即减速
+        self.adaptive_throttle = adaptive_throttle
+        self.throttle = throttle
+
+    def _get_fetcher(self):
+        """按需创建 HTTP 抓取器，未使用 http 引擎时不导入 aiohttp/lxml"""
+        if self._fetcher is None:
+            from app.fetch import HttpArticleFetcher
+            self._fetcher = HttpArticleFetcher(concurrency=self.http_concurrency)
+        return self._fetcher
+
+    async def close(self):
+        """释放 HTTP 连接池"""
+        if self._fetcher is not None:
+            await self._fetcher.close()
+            self._fetcher = None
+
+    def _get_cache(self) -> Optional[DocumentCache]:
+        """按需创建默认位置的文章缓存，关闭缓存时返回 None"""
+        if self.use_cache and self.cache is None:
+            self.cache = DocumentCache()
+        return self.cache if self.use_cache else None
 
+    def _get_journal(self) -> Optional[JobJournal]:
+        """按需打开默认位置的任务日志，关闭任务日志时返回 None"""
+        if self.use_journal and self.journal is None:
+            self.journal = JobJournal()
+        return self.journal if self.use_journal else None
+
+    def _open_job(self, kind: str, source: str, format_type: FormatTypes, output_dir: str,
+                  title: Optional[str] = None) -> Optional[Job]:
+        journal = self._get_journal()
+        if journal is None:
+            return None
+        format_type = format_type or self.default_format
+        formats = format_type.split(",") if isinstance(format_type, str) else list(format_type)
+        return journal.open_job(kind, source, formats, output_dir, title)
+
+    def _get_throttle(self) -> Optional[AdaptiveController]:
+        """按需创建限速器，浏览器和 HTTP 两条抓取路径共用，关闭时返回 None"""
+        if self.adaptive_throttle and self.throttle is None:
+            max_concurrency = max(self.concurrency, self.http_concurrency if self.engine == "http" else 1)
+            self.throttle = AdaptiveController(initial_concurrency=min(4, max_concurrency),
+                                               max_concurrency=max_concurrency)
+        return self.throttle if self.adaptive_throttle else None
+
+    def _create_retry_tracker(self) -> Optional[RetryTracker]:
+        return RetryTracker(self.retry_policies) if self.retry_failed else None
+
+    def _create_asset_pipeline(self, output_dir: str):
+        """每次下载(单篇或一组文章)一个图片管线，同一输出目录内的图片去重保存"""
+        if not self.localize_images:
+            return None
+        try:
+            from app.export.assets import AssetPipeline
+        except ImportError as e:
+            logger.info(f"无法加载图片下载模块({e})，不下载图片，保留原始图片链接")
+            return None
+        return AssetPipeline(Path(output_dir), concurrency=self.image_concurrency,
+                             recompress=self.recompress_images)
 
 
 
@@ -39,178 +181,616 @@ class WechatArticleDownloader:
 
     async def download_single_article(
         self, 
-        page: Page, 
-        url: str, 
+        page: Optional[Page] = None, 
+        url: str = "", 
         output_dir: Optional[str] = None,
-        format_type: Optional[str] = None):
+        format_type: FormatTypes = None,
+        page_factory: Optional[Callable[[], AsyncContextManager[Page]]] = None):
         
-        """下载单篇微信公众号文章并保存为 Markdown."""
-        format_type = format_type or self.default_format
-        exporter = ExporterFactory.create(format_type)
+        """下载单篇微信公众号文章并按一种或多种格式保存.
+
+        传入 page_factory(如 PagePool.page)时只在需要浏览器时才借页面。
+        """
+        if page_factory is None:
+            page_factory = lambda: _borrowed(page)
+        exporters = ExporterFactory.create_many(format_type or self.default_format)
         
         final_output_dir = self._prepare_output_dir(output_dir)
         logger.info(f"生成保存路径: {final_output_dir}")
 
+        assets = self._create_asset_pipeline(final_output_dir)
+        manifest = OutputManifest(Path(final_output_dir))
+
+        async def _worker(url):
+            document = await self._get_document(url, exporters, page_factory, final_output_dir,
+                                                manifest=manifest)
+            await self._save_document(document, url, final_output_dir, exporters, assets=assets, manifest=manifest)
+
         try:
-            await page.goto(url, timeout=60000)
-            output_path = await exporter.export(page, final_output_dir)
-            logger.info(f"文章已保存为 {output_path}")
+            await self._begin_exporters(exporters, final_output_dir, None, [url])
+            for _, error in await run_bounded([url], _worker, 1, retry=self._create_retry_tracker()):
+                if error:
+                    raise error
         except Exception as e:
             logger.error(f"下载文章 {url} 失败: {e}")
+        finally:
+            await self._finish_exporters(exporters)
+            if assets:
+                await assets.close()
+            if manifest.articles:
+                manifest.save()
+
+    async def parse_album(self, page: Optional[Page] = None, url: str = "",
+                          page_factory: Optional[Callable[[], AsyncContextManager[Page]]] = None):
+        """解析微信公众号合集，优先使用列表接口，失败时退回滚动页面解析(此时才借页面)."""
+        info = {"album_name": "未命名合集"}
+        page_factory = page_factory or (lambda: _borrowed(page))
+        articles = [article async for batch in self.iter_album(url, info, page_factory)
+                    for article in batch]
+        if not articles and info.get("error"):
+            return None
+        return {
+            "album_name": info["album_name"],
+            "articles": articles,
+            "total": len(articles)
+        }
+
+    async def iter_album(self, album_url, info: Dict,
+                         page_factory: Callable[[], AsyncContextManager[Page]]) -> AsyncIterator[List[Dict]]:
+        """边解析边产出合集文章批次，album_name 在第一批产出前写入 info
+
+        优先使用列表接口(不占用页面)；接口失败或没有文章时，
+        通过 page_factory 借一个页面滚动解析，已产出的文章不会重复产出。
+        """
+        seen = set()
+
+        def _new(batch):
+            fresh = [article for article in batch if article["link"] not in seen]
+            seen.update(article["link"] for article in fresh)
+            return fresh
 
-    async def parse_album(self, page: Page, album_url):
-        """解析微信公众号合集页面（自动判断类型），提取文章链接和标题."""
+        if self.album_mode == "api":
+            try:
+                from app.album import AlbumApiParser
+                parser = AlbumApiParser(api_base=self.album_api_base, throttle=self._get_throttle())
+                async for batch in parser.iter_articles(album_url):
+                    info["album_name"] = parser.album_name
+                    batch = _new(batch)
+                    if batch:
+                        yield batch
+                if seen:
+                    logger.info(f"通过合集接口解析到 {len(seen)} 篇文章")
+                    return
+                logger.info("合集接口未返回文章，改为滚动页面解析")
+            except Exception as e:
+                logger.info(f"合集接口解析失败({e})，改为滚动页面解析")
+
+        async with page_factory() as page:
+            async for batch in self._iter_album_dom(page, album_url, info):
+                batch = _new(batch)
+                if batch:
+                    yield batch
+
+    async def _iter_album_dom(self, page: Page, album_url, info: Dict) -> AsyncIterator[List[Dict]]:
+        """解析微信公众号合集页面（自动判断类型），每次展开/滚动后产出新出现的文章."""
         try:
+            # 池中的页面可能还留着上一篇文章的拦截策略，合集页的脚本、样式和懒加载都要正常执行
+            await apply_resource_policy(page, ALLOW_ALL)
             await page.goto(album_url, timeout=60000)
             logger.info("合集页面加载完成，开始解析（自动判断类型）...")
-            count_element = 0
-            album_name = "未命名合集"
             name_element = await page.query_selector("#js_tag_name")
             if name_element:
-                album_name = (await name_element.text_content()).replace("合集：#", "").strip()
-            logger.info(f"合集名称: {album_name}")
+                info["album_name"] = (await name_element.text_content()).replace("合集：#", "").strip()
+            logger.info(f"合集名称: {info['album_name']}")
+
+            # 以 link 为键的有序索引，去重为 O(1)，并保持页面中的顺序
+            articles: Dict[str, Dict] = {}
+            cursor = {"start": 0}
 
-            articles = []
+            stats = {"steps": 0, "waited": 0.0, "reason": "max_steps"}
 
             # 尝试查找“展开更多”按钮，判断是否为第一种合集类型
-            expand_more_button = await page.query_selector('div.unfold-more__word:has-text("展开更多")')
+            expand_more_button = await page.query_selector(EXPAND_MORE_SELECTOR)
 
             if expand_more_button:
                 # logger.info("检测到“展开更多”按钮，按第一种合集类型解析。")
-                
-
-                max_retries = 5
-                for _ in range(max_retries):
-                    try:
-                        await page.wait_for_selector('div.unfold-more__word:has-text("展开更多")', timeout=5000)
-                        buttons = await page.query_selector('div.unfold-more__word:has-text("展开更多")')
-                        if not buttons:
-                            # logger.info("已全部展开")
-                            break
-                        await buttons.click()
-                        # logger.info("点击了一次展开更多")
-                        await asyncio.sleep(1)
-                    except:
-                        # logger.info('已展开全部\n---THE END---')
+                list_selector = ".album__list.album_novel_list li"
+
+                while stats["steps"] < self.album_max_steps:
+                    yield await self._collect_album_items(page, list_selector, cursor, articles)
+                    button = await page.query_selector(EXPAND_MORE_SELECTOR)
+                    if not button or not await button.is_visible():
+                        stats["reason"] = "no_more"
+                        break
+                    outcome = await self._wait_for_album_growth(page, list_selector, cursor["start"],
+                                                                button.click, stats)
+                    if outcome != "grew":
+                        stats["reason"] = outcome
                         break
 
-                list_items = await page.query_selector_all(".album__list.album_novel_list li")
-                for item in list_items:
-                    title_element = await item.query_selector(".album__item-title-wrp")
-                    title = (await title_element.text_content()).strip() if title_element else "无标题"
-                    link = await item.get_attribute("data-link")
-                    if link and not any(article["link"] == link for article in articles):
-                        articles.append({"title": title, "link": link})
+                yield await self._collect_album_items(page, list_selector, cursor, articles)
 
             else:
                 # logger.info("未检测到“展开更多”按钮，按第二种合集类型（滚动加载）解析。")
-                
-
-                
-                
-                scroll_count = 0
-                max_scrolls = 1000
-                while scroll_count < max_scrolls:
-                    await page.wait_for_selector(".album__list.js_album_list", timeout=5000)
-                    list_items = await page.query_selector_all(".album__list.js_album_list li.album__list-item.js_album_item")
-                    initial_article_count = len(articles)
-
-                    for item in list_items:
-                        link = await item.get_attribute("data-link")
-                        title_element = await item.query_selector(".album__item-title-wrp")
-                        title = (await title_element.text_content()).strip() if title_element else "无标题"
-                        if link and not any(article["link"] == link for article in articles):
-                            articles.append({"title": title, "link": link})
-
-                    # logger.info(f"当前解析到 {len(articles)} 篇文章 (滚动加载)")
-
-                    # 检测是否到达底部，判断 style="display: none;"
-                    no_more_element = await page.query_selector(".over-line.js_no_more_album")
-                    if no_more_element:
-                        style = await no_more_element.get_attribute("style")
-                        if style and "display: none;" not in style:
-                            # logger.info("已到达合集底部，停止滚动。")
-                            break
-
-                    await page.evaluate("window.scrollBy(0, document.body.scrollHeight);")
-                    await asyncio.sleep(1)
-                    scroll_count += 1
-
-                    if len(articles) == initial_article_count and scroll_count > 10:
+                list_selector = ".album__list.js_album_list li.album__list-item.js_album_item"
+
+                await page.wait_for_selector(".album__list.js_album_list", timeout=self.album_step_timeout * 1000)
+                idle_steps = 0
+                while stats["steps"] < self.album_max_steps:
+                    yield await self._collect_album_items(page, list_selector, cursor, articles)
+
+                    outcome = await self._wait_for_album_growth(
+                        page, list_selector, cursor["start"],
+                        lambda: page.evaluate("window.scrollBy(0, document.body.scrollHeight);"), stats)
+                    if outcome == "end":
+                        # logger.info("已到达合集底部，停止滚动。")
+                        stats["reason"] = "no_more"
+                        break
+                    if outcome == "grew":
+                        idle_steps = 0
+                        continue
+                    idle_steps += 1
+                    if idle_steps >= self.album_idle_steps:
                         # logger.info("多次滚动未加载更多内容，停止滚动。")
+                        stats["reason"] = outcome
                         break
 
-            # logger.info(f"最终解析到 {len(articles)} 篇文章")
-            return {
-                "album_name": album_name,
-                "articles": articles,
-                "total": len(articles)
-            }
+                yield await self._collect_album_items(page, list_selector, cursor, articles)
+
+            logger.info(f"合集展开结束({stats['reason']}): 共 {stats['steps']} 步，"
+                        f"等待 {stats['waited']:.1f}s，解析到 {len(articles)} 篇文章")
 
         except Exception as e:
             logger.error(f"解析合集 {album_url} (自动判断类型) 失败: {e}")
-            return None
+            info["error"] = e
+
+    async def _wait_for_album_growth(self, page: Page, selector: str, count: int, action, stats: Dict) -> str:
+        """执行一次展开/滚动并等待可观察的信号，而不是固定 sleep
+
+        返回 "grew"(条目增加)、"end"(到底标记可见或展开按钮消失)、
+        "settled"(列表接口已响应但没有新条目) 或 "timeout"。
+        """
+        started = time.perf_counter()
+        timeout_ms = self.album_step_timeout * 1000
+        response_task = asyncio.ensure_future(page.wait_for_event(
+            "response", predicate=lambda response: "appmsgalbum" in response.url, timeout=timeout_ms))
+        growth_task = asyncio.ensure_future(page.wait_for_function(
+            ALBUM_GROWTH_JS, arg=[selector, count], timeout=timeout_ms))
+        try:
+            # 让等待任务先注册监听，再触发展开/滚动
+            await asyncio.sleep(0)
+            await action()
+            done, _ = await asyncio.wait({response_task, growth_task}, return_when=asyncio.FIRST_COMPLETED)
+            if growth_task not in done and not response_task.exception():
+                # 列表接口已返回，再给 DOM 一点时间渲染
+                await asyncio.wait({growth_task}, timeout=self.album_settle_timeout)
+                if not growth_task.done():
+                    return "settled"
+            if growth_task.done() and not growth_task.exception():
+                return await growth_task.result().json_value()
+            return "timeout"
+        finally:
+            for task in (response_task, growth_task):
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+            stats["steps"] += 1
+            stats["waited"] += time.perf_counter() - started
+
+    async def _collect_album_items(self, page: Page, selector: str, cursor: Dict,
+                                   articles: Dict[str, Dict]) -> List[Dict]:
+        """一次页面内求值取回上次之后新增的列表项，写入有序索引，返回新增的文章."""
+        result = await page.evaluate("""([selector, start]) => {
+            const items = document.querySelectorAll(selector);
+            // 列表被重建(条目变少)时从头开始，由调用方去重
+            const from = items.length < start ? 0 : start;
+            const found = [];
+            for (let i = from; i < items.length; i++) {
+                const titleElement = items[i].querySelector(".album__item-title-wrp");
+                found.push({
+                    title: titleElement ? titleElement.textContent.trim() : "无标题",
+                    link: items[i].getAttribute("data-link"),
+                });
+            }
+            return {count: items.length, items: found};
+        }""", [selector, cursor["start"]])
+        cursor["start"] = result["count"]
+        added = []
+        for item in result["items"]:
+            link = item["link"]
+            if link and link not in articles:
+                articles[link] = {"title": item["title"] or "无标题", "link": link}
+                added.append(articles[link])
+        return added
         
         
         
         
         
-    async def download_album(self, page: Page, album_url, output_dir=None,format_type: Optional[str] = None):
-        """下载微信公众号合集中的所有文章，重用传入的 page 对象."""
-        album_info = await self.parse_album(page, album_url)
-        logger.info(f"获取到的文章总数: {album_info['total']}")
-        if album_info and album_info["articles"]:
-            album_name = album_info["album_name"]
-            # default_base_dir = Path.home() / "Desktop" / "微信公众号文章"
-            final_dir = self._prepare_output_dir(output_dir,subfolder=album_name)
-            logger.info(f"生成保存路径: {final_dir}")
-            # album_output_dir = os.path.join(final_base_dir, album_name)
-            os.makedirs(final_dir, exist_ok=True)
-            
-            # 获取保存格式
-            format_type = format_type or self.default_format
-            
-            exporter = ExporterFactory.create(format_type=format_type)
-            
-            # logger.info(f"进入下载循环...,保存类型{format_type}")
-            
-            for index, article in enumerate(album_info["articles"]):
-                logger.info(f"开始下载第 {index + 1} 篇文章: {article['title']} - {article['link']}")
-                logger.info(f"已下载: {index} / {album_info['total']}")
-                try:
-                    await page.goto(article["link"], timeout=60000)
-                    title_element = await page.query_selector(".rich_media_title")
-                    if title_element:
-                        title = (await title_element.text_content()).strip()
-                        filename = f"{title}.{format_type}"
-                        filename = re.sub(r'[\\/:*?\"<>|]', '_', filename)
-                        await exporter.export(page, final_dir, filename)
-                    else:
-                        filename = f"{album_name} - {self._extract_title_from_url(article['link'])}.{format_type}"
-                        filename = re.sub(r'[\\/:*?\"<>|]', '_', filename)
-                        await exporter.export(page, final_dir, filename)
-                except Exception as e:
-                    logger.error(f"下载文章 {article['title']} - {article['link']} 失败: {e}")
-        else:
+    async def download_album(self, pool: PagePool, album_url, output_dir=None,format_type: FormatTypes = None,
+                             progress_callback: Optional[Callable[[int, int], None]] = None):
+        """下载微信公众号合集中的所有文章：边解析边下载，解析到的文章立即交给下载任务."""
+        info = {"album_name": "未命名合集"}
+        batches = self.iter_album(album_url, info, pool.page)
+        try:
+            first_batch = await batches.__anext__()
+        except StopAsyncIteration:
             logger.info(f"无法解析合集或合集为空: {album_url}")
+            return None
 
-    async def batch_download(self, page: Page, urls_text, output_dir=None,format_type:Optional[str] = None):
-        """批量下载微信公众号文章，urls_text 按行分割，每一行都是一个 URL."""
+        # 第一批产出时合集名称已确定，可以先建好目录
+        album_name = info["album_name"]
+        final_dir = self._prepare_output_dir(output_dir,subfolder=album_name)
+        job = self._open_job("album", album_url, format_type, final_dir, album_name)
 
-        final_output_dir = self._prepare_output_dir(output_dir=output_dir)
+        async def _articles():
+            for article in first_batch:
+                yield article
+            async for batch in batches:
+                for article in batch:
+                    yield article
+            # 滚动解析中途失败时 _iter_album_dom 只记录错误；抛出后来源不算完整，任务留待下次继续
+            if info.get("error"):
+                raise info["error"]
 
-        logger.info(f"生成保存路径: {final_output_dir}")
-        os.makedirs(final_output_dir, exist_ok=True)
-
-        urls = urls_text.strip().split('\n')
-        logger.info(f"分割成{len(urls)}个url...")
-        # urls = [url.strip() for url in urls if url.strip() and (url.startswith('http://') or url.startswith('https://'))]
-        logger.info(f"解析到 {len(urls)} 个 URL，开始下载到 {final_output_dir}...")
-        for url in urls:
-            logger.info(f"开始下载: {url}")
-            await self.download_single_article(page, url, final_output_dir,format_type=format_type)
+        return await self.download_articles(pool, _articles(), final_dir, format_type,
+                                            progress_callback=progress_callback, fallback_prefix=album_name,
+                                            job=job)
+
+    async def download_articles(
+        self,
+        pool: PagePool,
+        articles: Union[List, AsyncIterable],
+        output_dir: Optional[str] = None,
+        format_type: FormatTypes = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        fallback_prefix: Optional[str] = None,
+        job: Optional[Job] = None):
+        """并发下载一组文章，articles 中每项可以是 URL 或 {"title", "link"} 字典.
+
+        articles 也可以是异步可迭代对象(如正在解析的合集)，文章一出现就开始下载。
+        每篇文章完成时记入任务日志(job)；列表来源没有传入 job 时按链接列表自动登记为批量任务。
+        继续中断的任务时跳过已完成的文章，只有合并型导出器(EPUB)从缓存重新收录它们。
+        """
+        final_dir = self._prepare_output_dir(output_dir)
+        logger.info(f"生成保存路径: {final_dir}")
+
+        # 一次加载、一次提取，按所有选中的格式导出
+        exporters = ExporterFactory.create_many(format_type or self.default_format)
+
+        # 已知的文章链接，按合集顺序排列；流式来源时随解析增长
+        links: List[str] = []
+
+        collectors = [exporter for exporter in exporters if exporter.collects_articles]
+        # 合并型导出器的文件每次重新生成，不用来判断文章是否已有输出
+        collected_suffixes = {exporter.get_file_extension() for exporter in collectors}
+        manifest = OutputManifest(Path(final_dir), title=fallback_prefix)
+        skipped = 0
+        missing = 0
+
+        def _has_output(link: str) -> bool:
+            entry = manifest.articles.get(link)
+            return entry is not None and all((Path(final_dir) / name).exists() for name in entry["files"]
+                                             if Path(name).suffix not in collected_suffixes)
+
+        def _normalize(article):
+            nonlocal skipped, missing
+            item = article if isinstance(article, dict) else {"title": article, "link": article}
+            links.append(item["link"])
+            if job is None:
+                return item
+            self.journal.add_article(job, item["link"], item.get("title"), len(links))
+            if item["link"] not in job.completed:
+                return item
+            if not _has_output(item["link"]):
+                # 任务日志记为完成，但输出文件已被删除或移走，重新下载
+                missing += 1
+                return item
+            skipped += 1
+            return {**item, "resumed": True} if collectors else None
+
+        def _log_resumed():
+            if skipped:
+                logger.info(f"跳过已完成的 {skipped} 篇文章")
+            if missing:
+                logger.info(f"{missing} 篇已完成文章的输出文件不存在，重新下载")
+
+        streaming = hasattr(articles, "__aiter__")
+        exhausted = False
+        if streaming:
+            async def _stream():
+                nonlocal exhausted
+                async for article in articles:
+                    item = _normalize(article)
+                    if item is not None:
+                        yield item
+                exhausted = True
+                _log_resumed()
+            items = _stream()
+        else:
+            articles = list(articles)
+            if job is None:
+                job = self._open_job("batch", "\n".join(article["link"] if isinstance(article, dict) else article
+                                                        for article in articles), format_type, final_dir)
+            items = [item for item in map(_normalize, articles) if item is not None]
+            _log_resumed()
+        # http 引擎不占用页面，并发数不受页面池大小限制；
+        # 浏览器引擎多开与转换进程数相同的任务，使页面在前面的文章转换时继续加载
+        if self.engine == "http":
+            concurrency = self.http_concurrency
+        else:
+            concurrency = min(self.concurrency, pool.size) + get_conversion_pool().max_workers
+        # 流式来源由有界队列形成背压；滚动解析会占用一个页面，页面池只有一个页面时不限队列长度以免互相等待
+        max_pending = 0 if streaming and pool.size < 2 else None
+        if streaming:
+            logger.info(f"开始边解析边下载，并发数: {concurrency}")
+        else:
+            logger.info(f"开始并发下载 {len(items)} 篇文章，并发数: {concurrency}")
+
+        async def _worker(article):
+            logger.info(f"开始下载: {article['title']} - {article['link']}")
+            # 已完成的文章只交给合并型导出器，通常直接命中文章缓存
+            targets = collectors if article.get("resumed") else exporters
+            document = await self._get_document(article["link"], targets, pool.page, final_dir,
+                                                fallback_prefix, manifest)
+            # 页面已归还，导出在页面之外进行，浏览器可以继续加载下一篇
+            await self._save_document(document, article["link"], final_dir, targets, fallback_prefix, assets,
+                                      manifest)
+
+        saved_at = time.monotonic()
+
+        def _on_done(done, total, article, error):
+            nonlocal saved_at
+            if job is not None and not article.get("resumed"):
+                self.journal.mark(job, article["link"], error)
+                # 继续任务时按下载清单确认输出文件还在，进程崩溃时清单最多落后 MANIFEST_SAVE_INTERVAL 秒
+                if not error and time.monotonic() - saved_at > MANIFEST_SAVE_INTERVAL:
+                    manifest.save(order=links)
+                    saved_at = time.monotonic()
+            if error:
+                logger.error(f"下载文章 {article['title']} - {article['link']} 失败: {error}")
+            throttle = self.throttle if self.adaptive_throttle else None
+            logger.info(f"已下载: {done} / {total}" + (f"(速率 {throttle.rate:.1f} 次/秒，在途 {throttle.in_flight}，"
+                                                      f"并发上限 {throttle.concurrency})" if throttle else ""))
+            if progress_callback:
+                progress_callback(done, total)
+
+        assets = self._create_asset_pipeline(final_dir)
+        completed = False
+        retry = self._create_retry_tracker()
+        try:
+            await self._begin_exporters(exporters, final_dir, fallback_prefix, links)
+            results = await run_bounded(items, _worker, concurrency, on_done=_on_done, max_pending=max_pending,
+                                        retry=retry)
+            # 合集解析中途出错时，任务留待下次继续
+            completed = exhausted or not streaming
+        finally:
+            if job is not None:
+                self.journal.finish_job(job, completed)
+            await self._finish_exporters(exporters)
+            if assets:
+                await assets.close()
+            if manifest.articles:
+                manifest.save(order=links)
+        failures = [(article, error) for article, error in results if error and not article.get("resumed")]
+        write_failure_report(Path(final_dir), failures)
+        logger.info(f"下载结束，成功 {len(results) - len(failures)} 篇，失败 {len(failures)} 篇"
+                    + (f"，重试: {retry.summary()}" if retry and retry.retried else "")
+                    + f"；页面类型: {format_page_stats(count_page_kinds(results)) or '无'}")
+        return results
+
+    async def _begin_exporters(self, exporters: List[ArticleExporter], output_dir: str,
+                               title: Optional[str], links: List[str]):
+        """通知导出器一组文章开始导出；没有合集名时多篇用目录名，单篇由导出器按文章标题自行处理."""
+        if title is None:
+            if len(links) <= 1:
+                return
+            title = Path(output_dir).name
+        for exporter in exporters:
+            await exporter.begin(Path(output_dir), title, links)
+
+    async def _finish_exporters(self, exporters: List[ArticleExporter]):
+        for exporter in exporters:
+            try:
+                await exporter.finish()
+            except Exception as e:
+                logger.error(f"完成 {exporter.get_file_extension()} 导出失败: {e}")
+
+    def _prune_for(self, exporters: List[ArticleExporter]) -> PruneOptions:
+        """裁剪规则只执行所有导出器都允许的部分"""
+        prune = exporters[0].prune_options
+        for exporter in exporters[1:]:
+            prune = prune.merge(exporter.prune_options)
+        return prune
+
+    async def _get_document(self, url: str, exporters: List[ArticleExporter],
+                            page_factory: Callable[[], AsyncContextManager[Page]], output_dir: str,
+                            fallback_prefix: Optional[str] = None,
+                            manifest: Optional[OutputManifest] = None) -> ArticleDocument:
+        """依次尝试缓存、HTTP 引擎和浏览器取得文章，新抓取的结果写入缓存.
+
+        使用浏览器时，PDF 等依赖页面的格式在归还页面前直接用已渲染的页面导出。
+        """
+        cache = self._get_cache()
+        needs_page = any(exporter.requires_page for exporter in exporters)
+        if cache and not self.refresh_cache and not needs_page:
+            document = await asyncio.to_thread(cache.get, url, self._prune_for(exporters))
+            if document is not None:
+                logger.info(f"使用缓存的文章: {document.title or url}")
+                return document
+
+        document = await self._fetch_document_http(url, exporters)
+        # HTTP 引擎取得的是未裁剪的正文
+        prune = MINIMAL_PRUNE
+        if document is None:
+            async with page_factory() as page:
+                document = await self._load_document(page, url, exporters)
+                prune = self._prune_for(exporters)
+                await self._save_on_page(page, document, url, output_dir, exporters, fallback_prefix, manifest)
+        if cache:
+            await asyncio.to_thread(cache.put, url, document, prune)
+        return document
+
+    async def _load_document(self, page: Page, url: str, exporters: List[ArticleExporter]) -> ArticleDocument:
+        """在浏览器中打开文章并一次性提取 ArticleDocument，失败时抛出异常由调用方处理."""
+        if self.block_resources:
+            # 多个格式时只拦截所有导出器都不需要的资源
+            policy = exporters[0].resource_policy
+            for exporter in exporters[1:]:
+                policy = policy.merge(exporter.resource_policy)
+            await apply_resource_policy(page, policy)
+        # 限速器只计入导航和页面类型判断(验证页同样计入)，等待加载和提取正文时已释放名额
+        started = time.monotonic()
+        async with throttled(self._get_throttle()):
+            # DOM 解析完就判断页面类型，已删除、被屏蔽和验证页立即失败，不再等到超时
+            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            kind = await classify_page(page)
+            if kind != NORMAL:
+                logger.info(f"页面类型: {PAGE_KIND_NAMES[kind]}: {url}")
+            raise_for_page_kind(kind, url)
+        # 正常文章仍等到 load，由脚本填充的发布时间等信息才完整
+        await page.wait_for_load_state("load", timeout=max(1.0, 60 - (time.monotonic() - started)) * 1000)
+        document = await extract_document(page, wait_for_images=any(e.needs_images for e in exporters),
+                                          prune=self._prune_for(exporters))
+        blocked = pop_blocked_count(page)
+        if blocked:
+            logger.info(f"加载文章时拦截请求 {blocked} 个: {url}")
+        return document
+
+    async def _fetch_document_http(self, url: str, exporters: List[ArticleExporter]) -> Optional[ArticleDocument]:
+        """使用 http 引擎提取文章；未启用、需要浏览器页面的格式、正文缺失、验证页、网络错误或超时时返回 None 以退回浏览器."""
+        if self.engine != "http" or any(exporter.requires_page for exporter in exporters):
+            return None
+        # 只有启用 http 引擎时才导入 aiohttp
+        from aiohttp import ClientError
+        try:
+            async with throttled(self._get_throttle()):
+                return await self._get_fetcher().fetch(url)
+        except (ArticleDeletedError, ArticleBlockedError):
+            # 浏览器打开也是同样的结果
+            raise
+        except (ArticleError, ClientError, asyncio.TimeoutError) as e:
+            # 连接失败、HTTP 错误状态和超时同样交给浏览器再试
+            logger.info(f"HTTP 抓取失败({type(e).__name__}: {e})，改用浏览器下载: {url}")
+            return None
+
+    async def _save_document(self, document: ArticleDocument, url: str, output_dir: str,
+                             exporters: List[ArticleExporter], fallback_prefix: Optional[str] = None,
+                             assets=None, manifest: Optional[OutputManifest] = None):
+        """把已提取的文章依次交给每个导出器写入文件，并记录各格式用时和下载清单."""
+        exporters = [exporter for exporter in exporters if not exporter.requires_page]
+        if not exporters:
+            return []
+        local_images = {}
+        if assets:
+            localized = await assets.localize(document)
+            local_images = {original: local for original, local in zip(document.images, localized.images)
+                            if original != local}
+            document = localized
+        output_paths = []
+        for exporter in exporters:
+            started = time.perf_counter()
+            filename = self._make_filename(document.title, url, exporter, fallback_prefix)
+            output_path = await exporter.render(document, Path(output_dir), filename)
+            logger.info(f"文章已保存为 {output_path} ({exporter.get_file_extension()} 用时 "
+                        f"{time.perf_counter() - started:.2f}s)")
+            output_paths.append(output_path)
+        if manifest is not None:
+            manifest.add(url, document.title, output_paths, local_images)
+        return output_paths
+
+    async def _save_on_page(self, page: Page, document: ArticleDocument, url: str, output_dir: str,
+                            exporters: List[ArticleExporter], fallback_prefix: Optional[str] = None,
+                            manifest: Optional[OutputManifest] = None):
+        """用仍持有的页面导出需要页面的格式，每篇文章只渲染一次."""
+        output_paths = []
+        for exporter in exporters:
+            if not exporter.requires_page:
+                continue
+            started = time.perf_counter()
+            filename = self._make_filename(document.title, url, exporter, fallback_prefix)
+            output_path = await exporter.render_page(page, document, Path(output_dir), filename)
+            logger.info(f"文章已保存为 {output_path} ({exporter.get_file_extension()} 用时 "
+                        f"{time.perf_counter() - started:.2f}s)")
+            output_paths.append(output_path)
+        if manifest is not None and output_paths:
+            manifest.add(url, document.title, output_paths, {})
+        return output_paths
+
+    def _make_filename(self, title: Optional[str], url: str, exporter,
+                       fallback_prefix: Optional[str] = None) -> Optional[str]:
+        """根据标题生成文件名；没有标题且没有前缀时返回 None，由导出器自行决定."""
+        filename = None
+        if title:
+            filename = f"{title}{exporter.get_file_extension()}"
+        elif fallback_prefix:
+            filename = f"{fallback_prefix} - {self._extract_title_from_url(url)}{exporter.get_file_extension()}"
+        if filename:
+            filename = re.sub(r'[\\/:*?\"<>|]', '_', filename)
+        return filename
+
+    async def batch_download(self, pool: PagePool, urls_text, output_dir=None,format_type: FormatTypes = None,
+                             progress_callback: Optional[Callable[[int, int], None]] = None):
+        """批量下载微信公众号文章，urls_text 按行分割，每一行都是一个 URL."""
+        urls = [url.strip() for url in urls_text.strip().split('\n')
+                if url.strip() and not url.lstrip().startswith("#")]
+        logger.info(f"解析到 {len(urls)} 个 URL，开始下载...")
+        await self.download_articles(pool, urls, output_dir, format_type, progress_callback=progress_callback)
         logger.info("批量下载完成。")
 
+    async def reexport(self, output_dir: str, format_type: FormatTypes = None,
+                       progress_callback: Optional[Callable[[int, int], None]] = None):
+        """按输出目录中的下载清单，从文章缓存离线导出为其他格式，不访问网络也不启动浏览器.
+
+        图片沿用清单中记录的本地文件(assets/)，需要浏览器页面的格式(PDF)会被跳过。
+        """
+        from app.export.assets import rewrite_image_sources
+        manifest = OutputManifest(Path(output_dir))
+        if not manifest.articles:
+            raise ValueError(f"{output_dir} 中没有下载清单，无法离线导出")
+        cache = self.cache or DocumentCache()
+        exporters = ExporterFactory.create_many(format_type or self.default_format)
+        for exporter in exporters:
+            if exporter.requires_page:
+                logger.info(f"{exporter.get_file_extension()} 需要浏览器页面渲染，离线导出时跳过")
+        exporters = [exporter for exporter in exporters if not exporter.requires_page]
+        if not exporters:
+            raise ValueError("没有可以离线导出的格式")
+        prune = self._prune_for(exporters)
+        articles = list(manifest.articles.values())
+        links = [article["url"] for article in articles]
+
+        async def _worker(article):
+            document = await asyncio.to_thread(cache.get, article["url"], prune, True)
+            if document is None:
+                # 缓存的正文裁剪得比新格式要求的多，仍然可以导出，只是可能缺少部分内容
+                document = await asyncio.to_thread(cache.get, article["url"], None, True)
+                if document is None:
+                    raise ArticleError("缓存中没有这篇文章", article["url"])
+                logger.warning(f"缓存的正文已被裁剪，{article.get('title') or article['url']} 可能缺少部分内容")
+            document = rewrite_image_sources(document, article.get("assets", {}))
+            await self._save_document(document, article["url"], output_dir, exporters,
+                                      fallback_prefix=manifest.title, manifest=manifest)
+
+        def _on_done(done, total, article, error):
+            if error:
+                logger.error(f"离线导出 {article.get('title') or article['url']} 失败: {error}")
+            if progress_callback:
+                progress_callback(done, total)
+
+        logger.info(f"开始离线导出 {len(articles)} 篇文章: {output_dir}")
+        try:
+            await self._begin_exporters(exporters, output_dir, manifest.title, links)
+            results = await run_bounded(articles, _worker, get_conversion_pool().max_workers * 2,
+                                        on_done=_on_done)
+        finally:
+            await self._finish_exporters(exporters)
+            manifest.save(order=links)
+        failed = sum(1 for _, error in results if error)
+        logger.info(f"离线导出结束，成功 {len(results) - failed} 篇，失败 {failed} 篇")
+        return results
+
     def _extract_title_from_url(self, url):
         """简单地从 URL 中提取可能作为标题的片段."""
         parts = url.split('/')
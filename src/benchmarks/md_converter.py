@@ -0,0 +1,81 @@
+"""对比 html2text 与 WechatMarkdownConverter 的转换速度和输出大小
+
+语料为保存下来的文章 HTML：可以是浏览器“另存为”的完整文章页，
+也可以是 HTML 导出器生成的 .html 文件。完整页面会先按 HTTP 引擎的规则提取 #page-content。
+
+不指定目录时使用 benchmarks/corpus 中的 4 篇样例(长文和整段加粗、懒加载图片、代码块和列表、
+表格/链接卡片/引用)，结构取自常见的微信排版，文字为生成的占位内容。
+
+用法(在 src 目录下):
+    python -m benchmarks.md_converter [语料目录] [--repeat 5]
+
+参考结果(样例语料，Python 3.11，单核):
+    语料: 4 篇, 输入 303.0 KB, 重复 5 次
+    引擎                总耗时(s)      单篇(ms)      输出(KB)       压缩比
+    html2text          0.049       12.27        49.2    16.26%
+    wechat             0.031        7.74        49.9    16.47%   x1.6
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+from app.export.md import html_to_markdown
+from app.export.wechat_md import wechat_html_to_markdown
+
+
+CONVERTERS: Dict[str, Callable[[str], str]] = {
+    "html2text": html_to_markdown,
+    "wechat": wechat_html_to_markdown,
+}
+
+
+def load_corpus(corpus_dir: Path) -> List[str]:
+    documents = []
+    for path in sorted(corpus_dir.rglob("*.htm*")):
+        text = path.read_text(encoding="utf-8", errors="ignore")
+        if 'id="js_content"' in text:
+            from app.fetch import parse_article_html
+            try:
+                text = parse_article_html(text, path.resolve().as_uri()).content_html
+            except Exception as e:
+                print(f"跳过 {path.name}: {e}")
+                continue
+        documents.append(text)
+    return documents
+
+
+def run(documents: List[str], repeat: int):
+    input_bytes = sum(len(doc.encode("utf-8")) for doc in documents)
+    print(f"语料: {len(documents)} 篇, 输入 {input_bytes / 1024:.1f} KB, 重复 {repeat} 次\n")
+    print(f"{'引擎':<12}{'总耗时(s)':>12}{'单篇(ms)':>12}{'输出(KB)':>12}{'压缩比':>10}")
+    baseline = None
+    for name, convert in CONVERTERS.items():
+        best = float("inf")
+        output_bytes = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            outputs = [convert(doc) for doc in documents]
+            best = min(best, time.perf_counter() - started)
+            output_bytes = sum(len(out.encode("utf-8")) for out in outputs)
+        baseline = baseline or best
+        print(f"{name:<12}{best:>12.3f}{best / len(documents) * 1000:>12.2f}"
+              f"{output_bytes / 1024:>12.1f}{output_bytes / input_bytes:>10.2%}"
+              + (f"   x{baseline / best:.1f}" if best != baseline else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Markdown 转换引擎基准测试")
+    parser.add_argument("corpus_dir", type=Path, nargs="?", default=CORPUS_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    documents = load_corpus(args.corpus_dir)
+    if not documents:
+        raise SystemExit(f"{args.corpus_dir} 中没有找到 HTML 文件")
+    run(documents, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
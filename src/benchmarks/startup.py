@@ -0,0 +1,139 @@
+"""测量桌面程序的启动时间：进程启动到窗口首次绘制、浏览器服务就绪、第一篇文章下载完成
+
+每次测量都在新的子进程中冷启动，结果取中位数。没有显示器时自动使用 offscreen 平台。
+
+用法(在 src 目录下):
+    python -m benchmarks.startup [--repeat 5] [--url 文章链接 -o 输出目录] [--budget-ms 1500]
+超过 --budget-ms 时以非零状态退出，可以放进 CI 检查启动耗时回退。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+
+MARKER = "STARTUP "
+STAGES = ("imported", "window", "browser_ready", "first_download")
+STAGE_NAMES = {
+    "imported": "导入界面模块",
+    "window": "窗口首次绘制",
+    "browser_ready": "浏览器服务就绪",
+    "first_download": "第一篇下载完成",
+}
+
+
+def report(stage: str):
+    print(MARKER + json.dumps({"stage": stage, "time": time.time()}), flush=True)
+
+
+def child(url: Optional[str], output_dir: Optional[str], timeout: float):
+    """子进程：启动真实窗口并在各阶段打点"""
+    from PyQt5 import QtCore, QtWidgets
+    from app.ui.wx_ui import Ui_Window
+    report("imported")
+
+    app = QtWidgets.QApplication(sys.argv)
+    window = QtWidgets.QWidget()
+    ui = Ui_Window()
+    ui.setupUi(window)
+    app.aboutToQuit.connect(ui.shutdown)
+    started = time.monotonic()
+    pending = {}
+
+    def _poll():
+        for stage, future in list(pending.items()):
+            if future.done():
+                if future.exception():
+                    print(f"{STAGE_NAMES[stage]}失败: {future.exception()}", file=sys.stderr)
+                else:
+                    report(stage)
+                del pending[stage]
+        if not pending or time.monotonic() - started > timeout:
+            app.quit()
+
+    def _after_paint():
+        # 与用户操作一样通过服务提交；空协程在浏览器就绪后立即完成
+        pending["browser_ready"] = ui.service.submit(_noop())
+        if url:
+            pending["first_download"] = ui.service.submit(
+                ui.manager.download_one(url=url, output_dir=output_dir, format_type="md"))
+        timer.start(20)
+
+    class PaintWatcher(QtCore.QObject):
+        painted = False
+
+        def eventFilter(self, obj, event):
+            if event.type() == QtCore.QEvent.Paint and not self.painted:
+                self.painted = True
+                report("window")
+                QtCore.QTimer.singleShot(0, _after_paint)
+            return False
+
+    timer = QtCore.QTimer()
+    timer.timeout.connect(_poll)
+    watcher = PaintWatcher()
+    window.installEventFilter(watcher)
+    window.show()
+    app.exec_()
+
+
+async def _noop():
+    return None
+
+
+def measure_once(url: Optional[str], output_dir: Optional[str], timeout: float) -> Dict[str, float]:
+    env = dict(os.environ)
+    if sys.platform.startswith("linux") and not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    command = [sys.executable, "-m", "benchmarks.startup", "--child", "--timeout", str(timeout)]
+    if url:
+        command += ["--url", url, "-o", output_dir]
+    spawned = time.time()
+    result = subprocess.run(command, env=env, capture_output=True, text=True, timeout=timeout + 30)
+    timings = {}
+    for line in result.stdout.splitlines():
+        if line.startswith(MARKER):
+            event = json.loads(line[len(MARKER):])
+            timings[event["stage"]] = (event["time"] - spawned) * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="桌面程序启动耗时基准测试")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", help="测量第一篇文章下载完成的时间")
+    parser.add_argument("-o", "--output-dir", default=None)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--budget-ms", type=float, default=None, help="窗口首次绘制的耗时上限")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.url, args.output_dir, args.timeout)
+        return
+
+    output_dir = args.output_dir or tempfile.mkdtemp(prefix="weclip-startup-")
+    runs: List[Dict[str, float]] = [measure_once(args.url, output_dir, args.timeout) for _ in range(args.repeat)]
+
+    print(f"冷启动 {args.repeat} 次，单位 ms (中位数 / 最小 / 最大)\n")
+    for stage in STAGES:
+        values = [run[stage] for run in runs if stage in run]
+        if not values:
+            continue
+        print(f"{STAGE_NAMES[stage]:<12}{statistics.median(values):>10.0f}{min(values):>10.0f}{max(values):>10.0f}"
+              + ("" if len(values) == len(runs) else f"   ({len(values)}/{len(runs)} 次成功)"))
+
+    windows = [run["window"] for run in runs if "window" in run]
+    if not windows:
+        raise SystemExit("窗口没有完成绘制")
+    if args.budget_ms is not None and statistics.median(windows) > args.budget_ms:
+        raise SystemExit(f"窗口首次绘制耗时 {statistics.median(windows):.0f}ms 超过预算 {args.budget_ms:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
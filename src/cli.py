@@ -0,0 +1,214 @@
+"""无界面命令行入口，不导入 PyQt5，适合在服务器上由 cron 或脚本调用
+
+stdout 只输出 JSON Lines 格式的进度事件，日志统一写到 stderr。
+
+用法(在 src 目录下):
+    python cli.py article <URL> [<URL> ...] [-f md -f html] [-o 输出目录] [-c 并发数]
+    python cli.py album <合集URL> [-f epub]
+    python cli.py batch <URL文件|-> [--engine http]
+    python cli.py reexport <输出目录> -f html    (从文章缓存离线导出，不联网)
+    python cli.py resume [任务编号]              (不带编号时列出未完成的任务)
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# 只是数据类，不会加载 Playwright/Pillow
+from app.export.images import FORMAT_EXTENSIONS, RecompressOptions
+
+
+def emit(event: str, **fields):
+    """输出一行进度事件"""
+    print(json.dumps({"event": event, "time": round(time.time(), 3), **fields}, ensure_ascii=False), flush=True)
+
+
+def redirect_logs_to_stderr():
+    """应用日志默认写到 stdout，命令行模式下让出 stdout 给进度事件"""
+    import app.utils  # 控制台处理器挂在 app.utils 日志记录器上
+
+    for handler in logging.getLogger(app.utils.__name__).handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(sys.stderr)
+
+
+def parse_formats(values: Optional[List[str]]) -> List[str]:
+    formats = [part.strip() for value in values or ["md"] for part in value.split(",") if part.strip()]
+    return formats or ["md"]
+
+
+def read_urls(path: str) -> List[str]:
+    text = sys.stdin.read() if path == "-" else open(path, encoding="utf-8").read()
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+
+
+def recompress_options(args) -> Optional[RecompressOptions]:
+    """由 --recompress-* 参数得到压缩参数，都没有指定时不压缩"""
+    if args.recompress_width is None and args.recompress_format is None and args.recompress_quality is None:
+        return None
+    defaults = RecompressOptions()
+    return RecompressOptions(
+        max_width=defaults.max_width if args.recompress_width is None else (args.recompress_width or None),
+        format=args.recompress_format or defaults.format,
+        quality=defaults.quality if args.recompress_quality is None else args.recompress_quality,
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="weclip", description="微信公众号文章下载工具(命令行)")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-f", "--format", action="append", dest="formats", metavar="FORMAT",
+                        help="导出格式，可重复或用逗号分隔，如 -f md -f pdf 或 -f md,html (默认 md)")
+    common.add_argument("-o", "--output-dir", default=None, help="保存目录(默认 桌面/微信公众号文章)")
+    common.add_argument("-c", "--concurrency", type=int, default=4, help="浏览器页面数，即同时加载的文章数")
+    common.add_argument("--engine", choices=["browser", "http"], default="browser",
+                        help="抓取引擎：http 先直接请求 HTML，失败再用浏览器")
+    common.add_argument("--no-images", action="store_true", help="不下载图片，保留原始图片链接")
+    # 指定任意一个 --recompress-* 参数即启用图片压缩，其余参数取默认值
+    common.add_argument("--recompress-width", type=int, default=None, metavar="PX",
+                        help=f"压缩下载的图片：宽度超过 PX 的等比缩小，0 表示不缩放(默认 {RecompressOptions.max_width})")
+    common.add_argument("--recompress-format", choices=sorted(FORMAT_EXTENSIONS), default=None,
+                        help=f"压缩下载的图片：转换为该格式(默认 {RecompressOptions.format})")
+    common.add_argument("--recompress-quality", type=int, default=None, metavar="Q",
+                        help=f"压缩下载的图片：webp/jpeg 质量 1-100(默认 {RecompressOptions.quality})")
+    common.add_argument("--no-cache", action="store_true", help="不读写文章缓存(~/.weclip/cache)")
+    common.add_argument("--refresh", action="store_true", help="忽略已缓存的文章重新抓取，并更新缓存(缓存超过 7 天自动重新抓取)")
+    common.add_argument("--no-throttle", action="store_true", help="关闭自适应限速，按 -c 的并发数全速抓取")
+    common.add_argument("--no-journal", action="store_true", help="不记录任务日志，也不继续未完成的任务")
+
+    modes = parser.add_subparsers(dest="mode", required=True)
+    article = modes.add_parser("article", parents=[common], help="下载一篇或多篇文章")
+    article.add_argument("urls", nargs="+")
+    album = modes.add_parser("album", parents=[common], help="下载整个合集")
+    album.add_argument("url")
+    batch = modes.add_parser("batch", parents=[common], help="下载文件中的文章链接，每行一个，- 表示标准输入")
+    batch.add_argument("file")
+    reexport = modes.add_parser("reexport", help="按输出目录中的下载清单从缓存离线导出为其他格式")
+    reexport.add_argument("output_dir")
+    reexport.add_argument("-f", "--format", action="append", dest="formats", metavar="FORMAT",
+                          help="导出格式，同上(不支持 pdf)")
+    resume = modes.add_parser("resume", parents=[common], help="继续中断的合集或批量任务")
+    resume.add_argument("job_id", nargs="?", type=int)
+    return parser
+
+
+async def run_reexport(args) -> int:
+    """离线导出不需要浏览器"""
+    from app.export.executor import shutdown_conversion_pool
+    from app.wx import WechatArticleDownloader
+
+    formats = parse_formats(args.formats)
+    started = time.perf_counter()
+    emit("start", mode=args.mode, formats=formats, output_dir=args.output_dir)
+    try:
+        results = await WechatArticleDownloader().reexport(
+            args.output_dir, formats, progress_callback=lambda done, total: emit("progress", done=done, total=total))
+    except ValueError as e:
+        emit("error", message=str(e))
+        return 2
+    finally:
+        shutdown_conversion_pool()
+    return report(results, started)
+
+
+def report(results, started: float) -> int:
+    failed = [(article, error) for article, error in results if error]
+    for article, error in failed:
+        emit("failed", url=article.get("link") or article.get("url"), title=article.get("title"), error=str(error))
+    from app.classify import count_page_kinds
+
+    emit("finished", total=len(results), succeeded=len(results) - len(failed), failed=len(failed),
+         pages=count_page_kinds(results), elapsed=round(time.perf_counter() - started, 2))
+    # 继续任务时已完成的文章被跳过，没有结果不算失败
+    return 1 if failed else 0
+
+
+async def run(args) -> int:
+    # 只在这里导入下载相关模块，--help 和参数错误时不加载 Playwright
+    from app.browser import BrowserManager
+    from app.export.executor import shutdown_conversion_pool
+    from app.export.factory import ExporterFactory
+
+    job = None
+    if args.mode == "resume":
+        from app.journal import JobJournal
+
+        journal = JobJournal()
+        if args.job_id is None:
+            for unfinished in journal.unfinished_jobs():
+                emit("job", **unfinished)
+            return 0
+        job = journal.get_job(args.job_id)
+        if job is None:
+            emit("error", message=f"没有编号为 {args.job_id} 的任务")
+            return 2
+        # 沿用任务原来的格式和目录
+        args.formats, args.output_dir = job.formats, job.output_dir
+
+    formats = parse_formats(args.formats)
+    try:
+        # 启动浏览器前检查格式，不支持或互相冲突的格式直接报错
+        ExporterFactory.create_many(formats)
+    except ValueError as e:
+        emit("error", message=str(e))
+        return 2
+    manager = BrowserManager(pool_size=max(1, args.concurrency), engine=args.engine)
+    downloader = manager.downloader
+    downloader.localize_images = not args.no_images
+    downloader.recompress_images = recompress_options(args)
+    downloader.use_cache = not args.no_cache
+    downloader.refresh_cache = args.refresh
+    downloader.adaptive_throttle = not args.no_throttle
+    downloader.use_journal = not args.no_journal or job is not None
+    started = time.perf_counter()
+
+    def _progress(done: int, total: int):
+        # 附带限速器的实时指标：当前速率、并发上限和在途请求数
+        metrics = downloader.throttle.metrics() if downloader.throttle else {}
+        emit("progress", done=done, total=total, **metrics)
+
+    emit("start", mode=args.mode, formats=formats, output_dir=args.output_dir)
+    if not await manager.open_browser():
+        emit("error", message="浏览器启动失败")
+        await manager.close_browser()
+        return 2
+    try:
+        if job is not None and job.kind == "album":
+            # 合集目录(输出目录/合集名)由 download_album 重新拼出
+            results = await downloader.download_album(manager.pool, job.source, str(Path(job.output_dir).parent),
+                                                      formats, progress_callback=_progress)
+        elif job is not None:
+            results = await downloader.download_articles(manager.pool, job.source.splitlines(), job.output_dir,
+                                                         formats, progress_callback=_progress)
+        elif args.mode == "album":
+            results = await downloader.download_album(manager.pool, args.url, args.output_dir, formats,
+                                                      progress_callback=_progress)
+        else:
+            urls = args.urls if args.mode == "article" else read_urls(args.file)
+            results = await downloader.download_articles(manager.pool, urls, args.output_dir, formats,
+                                                         progress_callback=_progress)
+    finally:
+        await manager.close_browser()
+        shutdown_conversion_pool()
+    if results is None:
+        emit("error", message="无法解析合集或合集为空")
+        return 1
+    return report(results, started)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    redirect_logs_to_stderr()
+    try:
+        return asyncio.run(run_reexport(args) if args.mode == "reexport" else run(args))
+    except KeyboardInterrupt:
+        emit("error", message="已取消")
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# 让 pytest 从仓库根目录运行时也能导入 app 和 scripts(src 目录加入 sys.path)
@@ -8,5 +8,6 @@ if __name__ == "__main__":
     Window = QtWidgets.QWidget()
     ui = Ui_Window()
     ui.setupUi(Window)
+    app.aboutToQuit.connect(ui.shutdown)
     Window.show()
     sys.exit(app.exec_())
@@ -0,0 +1,61 @@
+"""合集接口桩服务器：回放录制的合集页面和分页 JSON，用于离线测试 AlbumApiParser
+
+录制目录结构:
+    album.html                  合集页面 HTML(用于解析合集名称)
+    getalbum_first.json         第一页接口响应
+    getalbum_<begin_msgid>.json 以 begin_msgid 为游标的后续页
+存在以 album_id 命名的子目录时从子目录回放，一个服务器可以回放多个合集(见 tests/fixtures/album)。
+
+用法:
+    python scripts/album_stub_server.py <录制目录> [--port 8765]
+然后以 WechatArticleDownloader(album_api_base="http://127.0.0.1:8765") 解析合集。
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+
+def make_handler(record_dir: Path):
+    class AlbumStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            query = parse_qs(parts.query)
+            if parts.path != "/mp/appmsgalbum":
+                return self._send(404, b"not found", "text/plain")
+            album_id = query.get("album_id", [""])[0]
+            album_dir = record_dir / album_id if album_id and Path(album_id).name == album_id else record_dir
+            if not album_dir.is_dir():
+                album_dir = record_dir
+            if query.get("f", [""])[0] != "json":
+                return self._send_file(album_dir / "album.html", "text/html; charset=utf-8")
+            cursor = query.get("begin_msgid", ["first"])[0]
+            return self._send_file(album_dir / f"getalbum_{cursor}.json", "application/json")
+
+        def _send_file(self, path: Path, content_type: str):
+            if not path.exists():
+                return self._send(404, b"not recorded", "text/plain")
+            return self._send(200, path.read_bytes(), content_type)
+
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return AlbumStubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回放录制的微信合集接口")
+    parser.add_argument("record_dir", type=Path)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.record_dir))
+    print(f"serving {args.record_dir} on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""用 scripts/album_stub_server.py 回放 tests/fixtures/album 中录制的合集接口，测试 AlbumApiParser
+
+    cd src && python -m pytest tests
+"""
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from app.album import AlbumApiParser
+from app.wx import WechatArticleDownloader
+from scripts.album_stub_server import make_handler
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "album"
+BIZ = "MzA5NzYxMzAxOA=="
+
+
+def album_url(album_id: str) -> str:
+    return f"https://mp.weixin.qq.com/mp/appmsgalbum?__biz={BIZ}&action=getalbum&album_id={album_id}#wechat_redirect"
+
+
+def article_link(n: int) -> str:
+    return (f"https://mp.weixin.qq.com/s?__biz={BIZ}&mid={2247480000 + n}&idx={2 if n == 3 else 1}"
+            f"&sn=sn{n:04d}&chksm=c{n:04d}#rd")
+
+
+@pytest.fixture(scope="module")
+def api_base():
+    handler = make_handler(FIXTURES)
+    handler.log_message = lambda *args: None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def collect(parser: AlbumApiParser, url: str):
+    async def _collect():
+        return [batch async for batch in parser.iter_articles(url)]
+    return asyncio.run(_collect())
+
+
+def test_pages_follow_cursor_in_order(api_base):
+    parser = AlbumApiParser(api_base=api_base)
+    batches = collect(parser, album_url("paged"))
+
+    assert parser.album_name == "读书笔记"
+    # 第二页以第一页最后一篇(msgid 2247480003)为游标，重复的第三章只产出一次
+    assert [[article["link"] for article in batch] for batch in batches] == [
+        [article_link(1), article_link(2), article_link(3)],
+        [article_link(4), article_link(5)],
+        [article_link(6)],
+    ]
+    assert batches[0][0]["title"] == "第一章 & 序言"
+
+
+def test_single_article_page_is_an_object(api_base):
+    result = asyncio.run(AlbumApiParser(api_base=api_base).parse(album_url("paged")))
+
+    assert result["total"] == 6
+    assert result["articles"][-1] == {"title": "后记", "link": article_link(6)}
+
+
+def test_api_error_code_raises(api_base):
+    with pytest.raises(RuntimeError, match="ret=-1"):
+        collect(AlbumApiParser(api_base=api_base), album_url("error"))
+
+
+def test_missing_album_id_raises(api_base):
+    with pytest.raises(ValueError):
+        collect(AlbumApiParser(api_base=api_base), f"https://mp.weixin.qq.com/mp/appmsgalbum?__biz={BIZ}")
+
+
+@pytest.mark.parametrize("album_id, api_links", [
+    # 第二页没有录制(404)：已产出的文章保留，滚动解析只补充新文章
+    ("broken", [article_link(1), article_link(2)]),
+    # 第一页就返回错误码
+    ("error", []),
+])
+def test_api_failure_falls_back_to_dom(api_base, album_id, api_links):
+    downloader = WechatArticleDownloader(album_api_base=api_base, adaptive_throttle=False)
+    dom_calls = []
+
+    async def _iter_album_dom(page, url, info):
+        dom_calls.append(url)
+        info["album_name"] = "读书笔记"
+        yield [{"title": f"第{n}篇", "link": article_link(n)} for n in (1, 2, 3)]
+
+    @asynccontextmanager
+    async def _page_factory():
+        yield None
+
+    downloader._iter_album_dom = _iter_album_dom
+
+    async def _collect():
+        info = {"album_name": "未命名合集"}
+        return [batch async for batch in downloader.iter_album(album_url(album_id), info, _page_factory)]
+
+    batches = asyncio.run(_collect())
+
+    assert dom_calls == [album_url(album_id)]
+    links = [article["link"] for batch in batches for article in batch]
+    assert links == api_links + [link for link in (article_link(1), article_link(2), article_link(3))
+                                 if link not in api_links]
@@ -0,0 +1,105 @@
+"""任务日志：批量下载中途失败后重新开始同一任务，只下载剩下的文章，EPUB 仍收录全部章节
+
+    cd src && python -m pytest tests
+"""
+import asyncio
+import xml.dom.minidom
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+from app.export.document import ArticleDocument
+from app.export.executor import shutdown_conversion_pool
+from app.journal import DONE, FAILED, JobJournal
+from app.wx import WechatArticleDownloader
+
+
+LINKS = [f"https://mp.weixin.qq.com/s/article{n}" for n in range(1, 5)]
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _conversion_pool():
+    yield
+    shutdown_conversion_pool()
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = JobJournal(tmp_path / "jobs.db")
+    yield journal
+    journal.close()
+
+
+def make_downloader(journal, failing=()):
+    """_get_document 直接返回构造的文章，记录每次调用时交给了哪些导出器"""
+    downloader = WechatArticleDownloader(journal=journal, use_cache=False, localize_images=False,
+                                         adaptive_throttle=False, retry_failed=False)
+    calls = []
+
+    async def _get_document(url, exporters, page_factory, output_dir, fallback_prefix=None, manifest=None):
+        calls.append((url, sorted(exporter.get_file_extension() for exporter in exporters)))
+        if url in failing:
+            raise TimeoutError(f"加载超时: {url}")
+        n = url[-1]
+        return ArticleDocument(f"第{n}篇", "作者", "2024-01-0" + n, f"<p>正文 {n}</p>", (), url)
+
+    downloader._get_document = _get_document
+    return downloader, calls
+
+
+def download(downloader, output_dir):
+    # 文章不经过浏览器，页面池只需要 size
+    pool = SimpleNamespace(size=2, page=None)
+    return asyncio.run(downloader.download_articles(pool, LINKS, str(output_dir), "html,epub"))
+
+
+def epub_chapter_titles(path):
+    with zipfile.ZipFile(path) as book:
+        nav = xml.dom.minidom.parseString(book.read("OEBPS/nav.xhtml"))
+        xml.dom.minidom.parseString(book.read("OEBPS/content.opf"))
+    return [link.firstChild.data for link in nav.getElementsByTagName("a")]
+
+
+def test_rerun_only_downloads_the_remainder(tmp_path, journal):
+    output_dir = tmp_path / "out"
+
+    downloader, calls = make_downloader(journal, failing={LINKS[2]})
+    results = download(downloader, output_dir)
+
+    errors = {article["link"]: error for article, error in results}
+    assert [errors[link] is not None for link in LINKS] == [False, False, True, False]
+    job = journal.get_job(1)
+    assert job.status == FAILED
+    assert sorted(path.name for path in output_dir.glob("*.html")) == ["第1篇.html", "第2篇.html", "第4篇.html"]
+    assert epub_chapter_titles(output_dir / "out.epub") == ["第1篇", "第2篇", "第4篇"]
+    assert (output_dir / "failed.txt").exists()
+
+    downloader, calls = make_downloader(journal)
+    download(downloader, output_dir)
+
+    # 只有失败的文章完整下载；已完成的只交给 EPUB 重新收录
+    full = [url for url, extensions in calls if extensions == [".epub", ".html"]]
+    assert full == [LINKS[2]]
+    assert sorted(url for url, extensions in calls if extensions == [".epub"]) == [LINKS[0], LINKS[1], LINKS[3]]
+    assert journal.get_job(1).status == DONE
+    assert (output_dir / "第3篇.html").exists()
+    assert epub_chapter_titles(output_dir / "out.epub") == ["第1篇", "第2篇", "第3篇", "第4篇"]
+    assert not (output_dir / "out.epub.part").exists()
+    assert not (output_dir / "failed.txt").exists()
+
+
+def test_rerun_requeues_completed_articles_with_missing_output(tmp_path, journal):
+    output_dir = tmp_path / "out"
+
+    downloader, _ = make_downloader(journal, failing={LINKS[3]})
+    download(downloader, output_dir)
+    (output_dir / "第1篇.html").unlink()
+
+    downloader, calls = make_downloader(journal)
+    download(downloader, output_dir)
+
+    full = sorted(url for url, extensions in calls if extensions == [".epub", ".html"])
+    assert full == [LINKS[0], LINKS[3]]
+    assert (output_dir / "第1篇.html").exists()
+    assert journal.get_job(1).status == DONE
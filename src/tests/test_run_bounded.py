@@ -0,0 +1,123 @@
+"""run_bounded：固定并发、流式来源的背压、延后重试和结束标记
+
+    cd src && python -m pytest tests
+"""
+import asyncio
+
+from app.pool import run_bounded
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=10))
+
+
+async def _source(items, fail_after=None, delay=0.0):
+    for index, item in enumerate(items):
+        if fail_after is not None and index == fail_after:
+            raise RuntimeError("来源中断")
+        await asyncio.sleep(delay)
+        yield item
+
+
+def test_empty_sources():
+    async def worker(item):
+        raise AssertionError("不应调用")
+
+    assert run(run_bounded([], worker, 4)) == []
+    assert run(run_bounded(_source([]), worker, 4)) == []
+
+
+def test_list_respects_concurrency():
+    running = 0
+    peak = 0
+
+    async def worker(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    done = []
+    results = run(run_bounded(range(10), worker, 3, on_done=lambda *args: done.append(args[:2])))
+
+    assert sorted(item for item, _ in results) == list(range(10))
+    assert all(error is None for _, error in results)
+    assert peak == 3
+    assert [count for count, _ in done] == list(range(1, 11))
+    assert all(total == 10 for _, total in done)
+
+
+def test_worker_errors_are_collected():
+    async def worker(item):
+        if item % 2:
+            raise ValueError(item)
+
+    results = dict(run(run_bounded(range(4), worker, 2)))
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], ValueError) and isinstance(results[3], ValueError)
+
+
+def test_retry_across_streaming_source():
+    attempts = {}
+    retries = []
+
+    async def worker(item):
+        attempts[item] = attempts.get(item, 0) + 1
+        # 第 2 项前两次失败，第 4 项一直失败
+        if (item == 2 and attempts[item] < 3) or item == 4:
+            raise TimeoutError(item)
+
+    def retry(item, error, attempt):
+        retries.append((item, attempt))
+        return 0.01 if attempt < 3 else None
+
+    done = []
+    results = run(run_bounded(_source(range(6), delay=0.005), worker, 2, retry=retry,
+                              on_done=lambda count, total, item, error: done.append(item)))
+
+    results = dict(results)
+    assert sorted(results) == list(range(6))
+    assert results[2] is None
+    assert isinstance(results[4], TimeoutError)
+    assert attempts[2] == 3 and attempts[4] == 3
+    assert sorted(retries) == [(2, 1), (2, 2), (4, 1), (4, 2), (4, 3)]
+    # on_done 只在最终完成时调用一次
+    assert sorted(done) == list(range(6))
+
+
+def test_source_failing_midway_finishes_discovered_items():
+    seen = []
+
+    async def worker(item):
+        seen.append(item)
+
+    results = run(run_bounded(_source(range(10), fail_after=3), worker, 2))
+
+    assert sorted(item for item, _ in results) == [0, 1, 2]
+    assert sorted(seen) == [0, 1, 2]
+
+
+def test_streaming_source_is_bounded():
+    produced = 0
+    started = 0
+    ahead = 0
+
+    async def source():
+        nonlocal produced, ahead
+        for item in range(20):
+            produced += 1
+            ahead = max(ahead, produced - started)
+            yield item
+
+    async def worker(item):
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.005)
+
+    results = run(run_bounded(source(), worker, 2, max_pending=2))
+
+    assert len(results) == 20
+    # 队列最多 2 项，加上 2 个 worker 正在处理的和生产者手上的 1 项
+    assert ahead <= 2 + 2 + 1
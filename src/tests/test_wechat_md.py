@@ -0,0 +1,69 @@
+"""固定 WechatMarkdownConverter 对常见微信结构的输出
+
+    cd src && python -m pytest tests
+"""
+import pytest
+
+from app.export.wechat_md import wechat_html_to_markdown
+
+
+@pytest.mark.parametrize("html, markdown", [
+    # 整段加粗：每个段落各自成对
+    ("<strong><p>para one</p><p>para two</p></strong>", "**para one**\n\n**para two**\n"),
+    # 链接卡片：标题和描述各是一个链接
+    ('<a href="https://x/y"><section><p>title</p></section><section><p>desc</p></section></a>',
+     "[title](https://x/y)\n\n[desc](https://x/y)\n"),
+    ("<p>a <em> b </em>c</p>", "a *b* c\n"),
+    ("<p><b> </b>plain</p>", "plain\n"),
+], ids=["strong-across-blocks", "link-across-blocks", "emphasis-whitespace", "empty-emphasis"])
+def test_emphasis_and_links(html, markdown):
+    assert wechat_html_to_markdown(html) == markdown
+
+
+@pytest.mark.parametrize("html, markdown", [
+    ("<p>- a</p>", "\\- a\n"),
+    ("<p>+ b</p>", "\\+ b\n"),
+    ("<p>&gt; c</p>", "\\> c\n"),
+    ("<p># d</p>", "\\# d\n"),
+    ("<p>1. e</p>", "1\\. e\n"),
+    ("<p>2) f</p>", "2\\) f\n"),
+    ("<p>---</p>", "\\---\n"),
+    ("<p>-x stays</p>", "-x stays\n"),
+    ("<p>a<br>- b</p>", "a  \n\\- b\n"),
+    ("<p>snake_case *star*</p>", "snake\\_case \\*star\\*\n"),
+])
+def test_line_start_escaping(html, markdown):
+    assert wechat_html_to_markdown(html) == markdown
+
+
+def test_lists():
+    html = "<ul><li>one</li><li>two<ol><li>a</li><li>b</li></ol></li></ul>"
+    assert wechat_html_to_markdown(html) == "- one\n\n- two\n\n  1. a\n\n  2. b\n"
+
+
+def test_table():
+    html = ("<table><tr><th>k</th><th>v</th></tr>"
+            "<tr><td>a|b</td><td><code>x</code></td></tr><tr><td>c</td></tr></table>")
+    assert wechat_html_to_markdown(html) == "| k | v |\n| --- | --- |\n| a\\|b | `x` |\n| c |  |\n"
+
+
+def test_code_block():
+    # 微信代码块每行一个 <code>，语言取自 code-snippet__ 类名，代码内容不转义
+    html = '<pre class="code-snippet__js"><code><span>let a_b = 1;</span></code><code>f(*x)</code></pre>'
+    assert wechat_html_to_markdown(html) == "```js\nlet a_b = 1;\nf(*x)\n```\n"
+
+
+@pytest.mark.parametrize("html, markdown", [
+    ("<p>call <code>foo_bar()</code> now</p>", "call `foo_bar()` now\n"),
+    ("<p><code>a`b</code></p>", "``a`b``\n"),
+    ("<p><strong>x <code>*y*</code></strong></p>", "**x `*y*`**\n"),
+    ("<p><code><b>k</b>_v</code></p>", "`k_v`\n"),
+])
+def test_inline_code(html, markdown):
+    assert wechat_html_to_markdown(html) == markdown
+
+
+def test_quote_and_lazy_image():
+    html = ('<blockquote><p>q1</p></blockquote>'
+            '<p><img data-src="https://img/1.jpg" src="data:image/gif;base64,AA" alt="pic"></p>')
+    assert wechat_html_to_markdown(html) == "> q1\n\n![pic](https://img/1.jpg)\n"